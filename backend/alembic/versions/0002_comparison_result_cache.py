@@ -0,0 +1,48 @@
+"""cache body comparisons per photo pair
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-02-01 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("body_photos", sa.Column("keypoints_hash", sa.String(length=64), nullable=True))
+    op.add_column(
+        "body_comparisons", sa.Column("keypoints_hash", sa.String(length=64), nullable=True)
+    )
+
+    # Keep only the most recent comparison per pair before enforcing uniqueness.
+    op.execute(
+        """
+        DELETE FROM body_comparisons AS stale
+        USING body_comparisons AS latest
+        WHERE stale.user_id = latest.user_id
+          AND stale.from_photo_id = latest.from_photo_id
+          AND stale.to_photo_id = latest.to_photo_id
+          AND (stale.created_at, stale.id) < (latest.created_at, latest.id)
+        """
+    )
+    op.create_index(
+        "ux_body_comparisons_user_pair",
+        "body_comparisons",
+        ["user_id", "from_photo_id", "to_photo_id"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ux_body_comparisons_user_pair", table_name="body_comparisons")
+    op.drop_column("body_comparisons", "keypoints_hash")
+    op.drop_column("body_photos", "keypoints_hash")
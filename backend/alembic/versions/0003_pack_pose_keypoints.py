@@ -0,0 +1,110 @@
+"""store pose keypoints as packed float32 arrays
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-02-15 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+import hashlib
+import struct
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# Frozen copy of app.models.keypoints.KEYPOINT_NAMES at the time of this revision.
+KEYPOINT_NAMES = (
+    "nose",
+    "neck",
+    "right_shoulder",
+    "right_elbow",
+    "right_wrist",
+    "left_shoulder",
+    "left_elbow",
+    "left_wrist",
+    "mid_hip",
+    "right_hip",
+    "right_knee",
+    "right_ankle",
+    "left_hip",
+    "left_knee",
+    "left_ankle",
+)
+_TRIPLE = struct.Struct("<3f")
+_NAN = float("nan")
+
+
+def _pack(keypoints: dict) -> bytes:
+    chunks = []
+    for name in KEYPOINT_NAMES:
+        point = keypoints.get(name)
+        if point is None:
+            chunks.append(_TRIPLE.pack(_NAN, _NAN, _NAN))
+        else:
+            chunks.append(_TRIPLE.pack(point["x"], point["y"], point.get("confidence", 0.0)))
+    return b"".join(chunks)
+
+
+def _unpack(packed: bytes) -> dict:
+    keypoints = {}
+    for name, (x, y, confidence) in zip(KEYPOINT_NAMES, _TRIPLE.iter_unpack(packed)):
+        if x == x:
+            keypoints[name] = {"x": x, "y": y, "confidence": confidence}
+    return keypoints
+
+
+def upgrade() -> None:
+    op.add_column("body_photos", sa.Column("pose_keypoints_packed", sa.LargeBinary(), nullable=True))
+
+    photos = sa.table(
+        "body_photos",
+        sa.column("id", sa.String),
+        sa.column("pose_keypoints", sa.JSON),
+        sa.column("pose_keypoints_packed", sa.LargeBinary),
+        sa.column("keypoints_hash", sa.String),
+    )
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(photos.c.id, photos.c.pose_keypoints).where(photos.c.pose_keypoints.is_not(None))
+    ).all()
+    for photo_id, keypoints in rows:
+        if keypoints is None:
+            continue
+        packed = _pack(keypoints)
+        bind.execute(
+            photos.update()
+            .where(photos.c.id == photo_id)
+            .values(pose_keypoints_packed=packed, keypoints_hash=hashlib.sha256(packed).hexdigest())
+        )
+
+    op.drop_column("body_photos", "pose_keypoints")
+
+
+def downgrade() -> None:
+    op.add_column("body_photos", sa.Column("pose_keypoints", sa.JSON(), nullable=True))
+
+    photos = sa.table(
+        "body_photos",
+        sa.column("id", sa.String),
+        sa.column("pose_keypoints", sa.JSON),
+        sa.column("pose_keypoints_packed", sa.LargeBinary),
+    )
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(photos.c.id, photos.c.pose_keypoints_packed).where(
+            photos.c.pose_keypoints_packed.is_not(None)
+        )
+    ).all()
+    for photo_id, packed in rows:
+        bind.execute(
+            photos.update().where(photos.c.id == photo_id).values(pose_keypoints=_unpack(packed))
+        )
+
+    op.drop_column("body_photos", "pose_keypoints_packed")
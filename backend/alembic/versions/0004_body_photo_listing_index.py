@@ -0,0 +1,29 @@
+"""index body photos for keyset listing
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2024-03-01 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_body_photos_user_view_taken_at",
+        "body_photos",
+        ["user_id", "view", sa.text("taken_at DESC")],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_body_photos_user_view_taken_at", table_name="body_photos")
@@ -0,0 +1,27 @@
+"""record derivative image keys on body photos
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2024-03-15 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("body_photos", sa.Column("thumbnail_key", sa.String(length=1024), nullable=True))
+    op.add_column("body_photos", sa.Column("compare_key", sa.String(length=1024), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("body_photos", "compare_key")
+    op.drop_column("body_photos", "thumbnail_key")
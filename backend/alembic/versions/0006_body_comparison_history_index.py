@@ -0,0 +1,28 @@
+"""index body comparisons for history listing
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2024-04-01 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_body_comparisons_user_created_at",
+        "body_comparisons",
+        ["user_id", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_body_comparisons_user_created_at", table_name="body_comparisons")
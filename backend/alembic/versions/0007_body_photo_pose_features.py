@@ -0,0 +1,108 @@
+"""precompute pose feature columns on body photos
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2024-04-01 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+import math
+import struct
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+# Frozen copies of app.models.keypoints.KEYPOINT_NAMES / FEATURE_SEGMENTS at this revision.
+KEYPOINT_NAMES = (
+    "nose",
+    "neck",
+    "right_shoulder",
+    "right_elbow",
+    "right_wrist",
+    "left_shoulder",
+    "left_elbow",
+    "left_wrist",
+    "mid_hip",
+    "right_hip",
+    "right_knee",
+    "right_ankle",
+    "left_hip",
+    "left_knee",
+    "left_ankle",
+)
+FEATURE_SEGMENTS = {
+    "shoulders": ("left_shoulder", "right_shoulder"),
+    "hip": ("left_hip", "right_hip"),
+    "arm": ("left_elbow", "right_elbow"),
+}
+FEATURE_COLUMNS = (
+    "torso_length",
+    "shoulders_ratio",
+    "hip_ratio",
+    "arm_ratio",
+    "shoulders_confidence",
+    "hip_confidence",
+    "arm_confidence",
+    "pose_confidence",
+    "shoulder_y",
+)
+_TRIPLE = struct.Struct("<3f")
+
+
+def _distance(points: dict, start: str, end: str) -> float:
+    (x1, y1, _), (x2, y2, _) = points[start], points[end]
+    return math.sqrt((x1 - x2) ** 2 + (y1 - y2) ** 2)
+
+
+def _features(packed: bytes) -> dict:
+    points = dict(zip(KEYPOINT_NAMES, _TRIPLE.iter_unpack(packed)))
+    torso = _distance(points, "neck", "mid_hip")
+    values = {"torso_length": torso}
+    confidences = []
+    for name, (start, end) in FEATURE_SEGMENTS.items():
+        width = _distance(points, start, end)
+        values[f"{name}_ratio"] = width / torso if torso else math.nan
+        present = [points[key][2] for key in (start, end) if not math.isnan(points[key][2])]
+        confidence = sum(present) / len(present) if present else 0.0
+        values[f"{name}_confidence"] = confidence
+        confidences.append(confidence)
+    values["pose_confidence"] = min(confidences)
+    values["shoulder_y"] = points["left_shoulder"][1]
+    return {
+        column: None if math.isnan(value) or math.isinf(value) else value
+        for column, value in values.items()
+    }
+
+
+def upgrade() -> None:
+    for column in FEATURE_COLUMNS:
+        op.add_column("body_photos", sa.Column(column, sa.Float(), nullable=True))
+
+    photos = sa.table(
+        "body_photos",
+        sa.column("id", sa.String),
+        sa.column("pose_keypoints_packed", sa.LargeBinary),
+        *(sa.column(column, sa.Float) for column in FEATURE_COLUMNS),
+    )
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(photos.c.id, photos.c.pose_keypoints_packed).where(
+            photos.c.pose_keypoints_packed.is_not(None)
+        )
+    ).all()
+    for photo_id, packed in rows:
+        bind.execute(
+            photos.update().where(photos.c.id == photo_id).values(**_features(bytes(packed)))
+        )
+
+
+def downgrade() -> None:
+    for column in reversed(FEATURE_COLUMNS):
+        op.drop_column("body_photos", column)
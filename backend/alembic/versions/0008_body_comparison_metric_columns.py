@@ -0,0 +1,41 @@
+"""promote comparison metrics to float columns
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2024-04-15 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+METRIC_COLUMNS = ("delta_waist_pct", "delta_hip_pct", "delta_shoulders_pct", "delta_arm_pct")
+
+
+def upgrade() -> None:
+    for column in (*METRIC_COLUMNS, "confidence"):
+        op.add_column("body_comparisons", sa.Column(column, sa.Float(), nullable=True))
+
+    assignments = ",\n            ".join(
+        f"{column} = (result -> 'metrics' ->> '{column}')::double precision"
+        for column in METRIC_COLUMNS
+    )
+    op.execute(
+        f"""
+        UPDATE body_comparisons
+        SET {assignments},
+            confidence = (result ->> 'confidence')::double precision
+        """
+    )
+
+
+def downgrade() -> None:
+    for column in ("confidence", *reversed(METRIC_COLUMNS)):
+        op.drop_column("body_comparisons", column)
@@ -0,0 +1,41 @@
+"""persist bioimpedance records
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2024-05-01 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "bioimpedance_records",
+        sa.Column("id", sa.String(length=36), primary_key=True),
+        sa.Column("user_id", sa.String(length=36), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("measured_at", sa.Date(), nullable=False),
+        sa.Column("weight_kg", sa.Float(), nullable=False),
+        sa.Column("fat_pct", sa.Float(), nullable=False),
+        sa.Column("muscle_pct", sa.Float(), nullable=False),
+        sa.Column("visceral_fat", sa.Float(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index(
+        "ix_bioimpedance_records_user_measured_at",
+        "bioimpedance_records",
+        ["user_id", "measured_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_bioimpedance_records_user_measured_at", table_name="bioimpedance_records")
+    op.drop_table("bioimpedance_records")
@@ -0,0 +1,27 @@
+"""body photo pose estimation retry mark
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2024-05-08 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "body_photos", sa.Column("pose_retry_after", sa.DateTime(timezone=True), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("body_photos", "pose_retry_after")
@@ -0,0 +1,25 @@
+"""body photo content digest for derivative keys
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2024-05-15 00:00:00.000000
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("body_photos", sa.Column("content_sha256", sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("body_photos", "content_sha256")
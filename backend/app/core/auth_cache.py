@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import Any
+
+from redis.asyncio import Redis
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.config import get_settings
+from app.core.redis import get_redis, schedule_redis_write
+from app.models import User
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class TokenCache:
+    """Bounded LRU of verified JWT payloads keyed by token digest, each expiring at its ``exp``."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+
+    def get(self, token: str) -> dict[str, Any] | None:
+        key = token_digest(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, token: str, payload: dict[str, Any]) -> None:
+        expires_at = payload.get("exp")
+        if not isinstance(expires_at, (int, float)):
+            return
+        key = token_digest(token)
+        self._entries[key] = (float(expires_at), payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+# Credentials never go into the cache; ``hashed_password`` stays unloaded on cached users.
+_USER_FIELDS = ("id", "email", "is_active", "created_at")
+
+
+def _user_to_json(user: User) -> str:
+    values = {field: getattr(user, field) for field in _USER_FIELDS}
+    values["created_at"] = values["created_at"].isoformat() if values["created_at"] else None
+    return json.dumps(values)
+
+
+def _user_from_json(raw: str) -> User:
+    values = json.loads(raw)
+    if values["created_at"]:
+        values["created_at"] = datetime.fromisoformat(values["created_at"])
+    user = User(**values)
+    # Mark as an existing row so adding it to a session never issues an INSERT.
+    make_transient_to_detached(user)
+    return user
+
+
+class UserCache:
+    """Short-TTL cache of user rows, shared through Redis when one is configured.
+
+    Entries are serialized either way so callers always get a fresh detached ``User``
+    rather than an instance another request may be holding.
+    """
+
+    key_prefix = "auth:user:"
+
+    def __init__(self, ttl_seconds: int, max_entries: int, redis: Redis | None = None) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.redis = redis
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    async def get(self, user_id: str) -> User | None:
+        if self.redis is not None:
+            raw = await self.redis.get(self.key_prefix + user_id)
+            return _user_from_json(raw) if raw else None
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return _user_from_json(entry[1])
+
+    async def put(self, user: User) -> None:
+        raw = _user_to_json(user)
+        if self.redis is not None:
+            await self.redis.set(self.key_prefix + user.id, raw, ex=self.ttl_seconds)
+            return
+        self._entries[user.id] = (time.monotonic() + self.ttl_seconds, raw)
+        self._entries.move_to_end(user.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard_local(self, user_id: str) -> None:
+        self._entries.pop(user_id, None)
+
+    async def invalidate(self, user_id: str) -> None:
+        self.discard_local(user_id)
+        if self.redis is not None:
+            await self.redis.delete(self.key_prefix + user_id)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+@lru_cache
+def get_token_cache() -> TokenCache:
+    return TokenCache(max_entries=get_settings().auth_token_cache_size)
+
+
+@lru_cache
+def get_user_cache() -> UserCache:
+    settings = get_settings()
+    return UserCache(
+        ttl_seconds=settings.auth_user_cache_ttl_seconds,
+        max_entries=settings.auth_user_cache_size,
+        redis=get_redis(),
+    )
+
+
+@event.listens_for(User.is_active, "set")
+def _track_activation_change(target: User, value, oldvalue, initiator) -> None:
+    session = Session.object_session(target)
+    if target.id is not None and session is not None and value != oldvalue:
+        session.info.setdefault("auth_invalidated_users", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_cached_users(session: Session) -> None:
+    user_ids = session.info.pop("auth_invalidated_users", None)
+    if not user_ids:
+        return
+    cache = get_user_cache()
+    for user_id in user_ids:
+        cache.discard_local(user_id)
+    if cache.redis is not None:
+        # Commit hooks are synchronous, so the shared entries are dropped as a loop task.
+        schedule_redis_write(
+            cache.redis.delete(*(cache.key_prefix + user_id for user_id in user_ids)),
+            "auth user cache invalidation",
+        )
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_activation_changes(session: Session) -> None:
+    session.info.pop("auth_invalidated_users", None)
@@ -1,15 +1,228 @@
+import time
+from collections import OrderedDict
 from collections.abc import AsyncGenerator
+from contextvars import ContextVar
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from prometheus_client import Counter, Gauge, Histogram
+from redis.asyncio import Redis
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-from app.core.config import get_settings
+from app.core.config import Settings, get_settings
+from app.core.redis import get_redis, schedule_redis_write
+
+
+# Plain gauges, set from pool events, so prometheus multiprocess mode can sum them per
+# live worker (callback gauges are not collected there).
+POOL_SIZE = Gauge(
+    "h_life_db_pool_size",
+    "Configured connection pool size",
+    labelnames=("pool",),
+    multiprocess_mode="livesum",
+)
+POOL_CHECKED_OUT = Gauge(
+    "h_life_db_pool_checked_out",
+    "Connections currently checked out",
+    labelnames=("pool",),
+    multiprocess_mode="livesum",
+)
+POOL_OVERFLOW = Gauge(
+    "h_life_db_pool_overflow",
+    "Connections open beyond pool_size (negative while the pool is still filling)",
+    labelnames=("pool",),
+    multiprocess_mode="livesum",
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    "h_life_db_pool_checkout_wait_seconds",
+    "Time spent waiting for an idle pooled connection, excluding opening new ones",
+    labelnames=("pool",),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+POOL_TIMEOUTS = Counter(
+    "h_life_db_pool_timeouts_total",
+    "Checkouts that gave up after pool_timeout",
+    labelnames=("pool",),
+)
+
+
+# Seconds the current checkout spent opening a new connection, excluded from the wait.
+_connect_seconds: ContextVar[list[float] | None] = ContextVar("_connect_seconds", default=None)
+
+
+def _instrumented_pool_class(label: str) -> type[AsyncAdaptedQueuePool]:
+    wait = POOL_CHECKOUT_WAIT.labels(label)
+    timeouts = POOL_TIMEOUTS.labels(label)
+
+    class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+        def connect(self):
+            spent = [0.0]
+            token = _connect_seconds.set(spent)
+            started = time.perf_counter()
+            try:
+                return super().connect()
+            except exc.TimeoutError:
+                timeouts.inc()
+                raise
+            finally:
+                _connect_seconds.reset(token)
+                wait.observe(time.perf_counter() - started - spent[0])
+
+    return InstrumentedAsyncPool
+
+
+def _track_pool(engine: AsyncEngine, label: str) -> None:
+    """Keep the pool gauges current through public pool events.
+
+    Overflow is counted from connect/close events (open connections minus pool_size)
+    rather than read from the pool, whose counter only drops after the close event.
+    Listeners are registered on the engine so they survive dispose()/recreate().
+    """
+
+    sync_engine = engine.sync_engine
+    size = sync_engine.pool.size()
+    checked_out = POOL_CHECKED_OUT.labels(label)
+    overflow = POOL_OVERFLOW.labels(label)
+    opened = 0
+
+    def _count(delta: int) -> None:
+        nonlocal opened
+        opened += delta
+        overflow.set(opened - size)
+
+    def _connect_started(dialect, connection_record, cargs, cparams) -> None:
+        connection_record.info["connect_started"] = time.perf_counter()
+
+    def _connected(dbapi_connection, connection_record) -> None:
+        started = connection_record.info.pop("connect_started", None)
+        spent = _connect_seconds.get()
+        if started is not None and spent is not None:
+            spent[0] += time.perf_counter() - started
+        _count(1)
+
+    POOL_SIZE.labels(label).set(size)
+    overflow.set(-size)
+    event.listen(sync_engine, "do_connect", _connect_started)
+    event.listen(sync_engine, "connect", _connected)
+    event.listen(sync_engine, "close", lambda *args: _count(-1))
+    event.listen(sync_engine, "close_detached", lambda *args: _count(-1))
+    event.listen(sync_engine, "checkout", lambda *args: checked_out.inc())
+    event.listen(sync_engine, "checkin", lambda *args: checked_out.dec())
+
+
+def build_engine(url: str, settings: Settings, label: str = "primary") -> AsyncEngine:
+    """Async engine with the configured pool, exporting pool metrics under ``label``."""
+
+    database_url = make_url(url)
+    if database_url.get_backend_name() == "sqlite":
+        return create_async_engine(database_url, echo=False, future=True)
+
+    connect_args = {}
+    if database_url.get_driver_name() == "asyncpg":
+        # Both asyncpg's own statement cache and SQLAlchemy's prepared statement cache;
+        # set to 0 when running behind a transaction-pooling pgbouncer.
+        connect_args["statement_cache_size"] = settings.db_statement_cache_size
+        database_url = database_url.update_query_dict(
+            {"prepared_statement_cache_size": str(settings.db_statement_cache_size)}
+        )
+
+    engine = create_async_engine(
+        database_url,
+        echo=False,
+        future=True,
+        poolclass=_instrumented_pool_class(label),
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+        pool_recycle=settings.db_pool_recycle_seconds,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args=connect_args,
+    )
+    _track_pool(engine, label)
+    return engine
+
+
+class RecentWriters:
+    """Remembers who committed a write in the last ``window_seconds``.
+
+    Their reads stay on the primary until replicas have had time to catch up. Marks are
+    kept locally and, when Redis is configured, mirrored there so other workers see them.
+    """
+
+    key_prefix = "rw:"
+
+    def __init__(self, window_seconds: float, redis: Redis | None = None) -> None:
+        self.window_seconds = window_seconds
+        self.redis = redis
+        self._marks: OrderedDict[str, float] = OrderedDict()
+
+    def mark(self, key: str) -> None:
+        now = time.monotonic()
+        self._marks[key] = now
+        self._marks.move_to_end(key)
+        while self._marks and next(iter(self._marks.values())) <= now - self.window_seconds:
+            self._marks.popitem(last=False)
+        if self.redis is not None:
+            schedule_redis_write(
+                self.redis.set(self.key_prefix + key, "1", px=int(self.window_seconds * 1000)),
+                "read-your-writes mark",
+            )
+
+    async def is_recent(self, key: str) -> bool:
+        marked = self._marks.get(key)
+        if marked is not None and time.monotonic() - marked < self.window_seconds:
+            return True
+        if self.redis is None:
+            return False
+        return bool(await self.redis.exists(self.key_prefix + key))
 
 
 settings = get_settings()
-engine = create_async_engine(str(settings.database_url), echo=False, future=True)
+engine = build_engine(str(settings.database_url), settings)
 AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+if settings.database_read_url is not None:
+    read_engine = build_engine(str(settings.database_read_url), settings, label="replica")
+    AsyncReadSessionLocal = async_sessionmaker(
+        read_engine, expire_on_commit=False, class_=AsyncSession
+    )
+else:
+    read_engine = engine
+    AsyncReadSessionLocal = AsyncSessionLocal
+recent_writers = RecentWriters(settings.db_read_your_writes_seconds, get_redis())
+
+
+@event.listens_for(Session, "after_flush")
+def _note_write(session: Session, flush_context) -> None:
+    if "writer_key" in session.info:
+        session.info["wrote"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_writer(session: Session) -> None:
+    if session.info.pop("wrote", False):
+        recent_writers.mark(session.info["writer_key"])
+
+
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    return AsyncSessionLocal
+
+
+def track_writes(session: AsyncSession, user_id: str) -> None:
+    """Attribute commits on ``session`` to ``user_id`` for read-your-writes routing."""
+
+    session.info["writer_key"] = user_id
 
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def read_session_factory(user_id: str) -> async_sessionmaker[AsyncSession]:
+    """The replica factory, or the primary one right after ``user_id`` wrote."""
+
+    if AsyncReadSessionLocal is not AsyncSessionLocal and await recent_writers.is_recent(user_id):
+        return AsyncSessionLocal
+    return AsyncReadSessionLocal
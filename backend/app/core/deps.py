@@ -1,9 +1,12 @@
+from collections.abc import AsyncGenerator
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.core.database import get_session
+from app.core.auth_cache import TokenCache, UserCache, get_token_cache, get_user_cache
+from app.core.database import get_session, read_session_factory, track_writes
 from app.core.security import decode_token
 from app.models import User
 
@@ -12,19 +15,42 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
 async def get_current_user(
-    token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_session)
+    token: str = Depends(oauth2_scheme),
+    session: AsyncSession = Depends(get_session),
+    token_cache: TokenCache = Depends(get_token_cache),
+    user_cache: UserCache = Depends(get_user_cache),
 ) -> User:
-    try:
-        payload = decode_token(token)
-    except ValueError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    payload = token_cache.get(token)
+    if payload is None:
+        try:
+            payload = decode_token(token)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+        token_cache.put(token, payload)
 
     user_id = payload.get("sub")
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
+    # Writes made through this request's session mark the user for read-your-writes.
+    track_writes(session, user_id)
+    user = await user_cache.get(user_id)
+    if user is not None:
+        return user
+
     user = await session.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    await user_cache.put(user)
 
     return user
+
+
+async def get_read_session(
+    current_user: User = Depends(get_current_user),
+) -> AsyncGenerator[AsyncSession, None]:
+    """Session on the read replica, or on the primary right after this user wrote."""
+
+    factory = await read_session_factory(current_user.id)
+    async with factory() as session:
+        yield session
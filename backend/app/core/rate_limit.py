@@ -1,55 +1,193 @@
 from __future__ import annotations
 
 import asyncio
+import logging
+import math
 import time
-from collections import deque
-from typing import Awaitable, Callable, Deque, Dict
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict
 
 from fastapi import Depends, HTTPException, status
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
 
 from app.core.config import get_settings
+from app.core.redis import get_redis
 
 IdentifierDependency = Callable[..., Awaitable[str] | str]
 
+logger = logging.getLogger(__name__)
+
+
+def _rate_limited(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Rate limit exceeded for vision/AI endpoint",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
 
 class InMemoryRateLimiter:
-    def __init__(self, max_requests: int, window_seconds: int) -> None:
+    """GCRA limiter: ``max_requests`` per ``window_seconds`` with bursts up to ``max_requests``.
+
+    Each key stores only its theoretical arrival time (TAT); a request is admitted when
+    the TAT is no more than ``window_seconds - interval`` ahead of now. Updating a TAT
+    never awaits, so no lock is needed. Keys are spread over shards that a background
+    sweeper visits one at a time, dropping keys whose TAT has passed.
+    """
+
+    def __init__(
+        self,
+        max_requests: int,
+        window_seconds: int,
+        shards: int = 16,
+        sweep_interval_seconds: float = 60.0,
+    ) -> None:
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-        self._buckets: Dict[str, Deque[float]] = {}
-        self._lock = asyncio.Lock()
+        self.interval = window_seconds / max_requests
+        self.tolerance = window_seconds - self.interval
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._shards: list[Dict[str, float]] = [{} for _ in range(max(1, shards))]
+        self._sweeper: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    def acquire(self, key: str, now: float | None = None) -> float:
+        """Admit a request for ``key``; returns 0 or the seconds to wait before retrying."""
+
+        now = time.monotonic() if now is None else now
+        shard = self._shards[hash(key) % len(self._shards)]
+        tat = max(shard.get(key, now), now)
+        if tat - now > self.tolerance:
+            return tat - now - self.tolerance
+        shard[key] = tat + self.interval
+        return 0.0
+
+    def sweep_shard(self, index: int, now: float | None = None) -> int:
+        """Evict keys whose TAT has passed; their state equals that of an unseen key."""
+
+        now = time.monotonic() if now is None else now
+        shard = self._shards[index]
+        idle = [key for key, tat in shard.items() if tat <= now]
+        for key in idle:
+            del shard[key]
+        return len(idle)
+
+    def sweep(self, now: float | None = None) -> int:
+        return sum(self.sweep_shard(index, now) for index in range(len(self._shards)))
+
+    async def _sweep_forever(self) -> None:
+        pause = self.sweep_interval_seconds / len(self._shards)
+        while True:
+            for index in range(len(self._shards)):
+                await asyncio.sleep(pause)
+                self.sweep_shard(index)
+
+    def _ensure_sweeper(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._sweeper is None or self._sweeper.done() or self._sweeper.get_loop() is not loop:
+            self._sweeper = loop.create_task(self._sweep_forever())
 
     async def check(self, key: str) -> None:
-        async with self._lock:
-            now = time.monotonic()
-            bucket = self._buckets.setdefault(key, deque())
-            while bucket and now - bucket[0] > self.window_seconds:
-                bucket.popleft()
-            if len(bucket) >= self.max_requests:
-                raise HTTPException(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    detail="Rate limit exceeded for vision/AI endpoint",
+        self._ensure_sweeper()
+        retry_after = self.acquire(key)
+        if retry_after:
+            raise _rate_limited(retry_after)
+
+    def close(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+
+
+# Same GCRA as InMemoryRateLimiter.acquire, evaluated atomically on the Redis server clock.
+_GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+if tat - now > tolerance then
+    return tostring(tat - now - tolerance)
+end
+local new_tat = tat + interval
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return '0'
+"""
+
+
+class RedisRateLimiter:
+    """GCRA limiter shared by every worker through Redis.
+
+    Falls back to a local ``InMemoryRateLimiter`` with the same parameters while Redis
+    is unreachable, so limits degrade to per-process instead of disappearing.
+    """
+
+    key_prefix = "rate_limit:"
+
+    def __init__(
+        self, redis: Redis, max_requests: int, window_seconds: int, **fallback_options
+    ) -> None:
+        self.redis = redis
+        self.fallback = InMemoryRateLimiter(max_requests, window_seconds, **fallback_options)
+        self._script = redis.register_script(_GCRA_SCRIPT)
+
+    async def check(self, key: str) -> None:
+        try:
+            retry_after = float(
+                await self._script(
+                    keys=[self.key_prefix + key],
+                    args=[self.fallback.interval, self.fallback.tolerance],
                 )
-            bucket.append(now)
+            )
+        except RedisError as exc:
+            logger.warning("rate limiter falling back to local state: %s", exc)
+            await self.fallback.check(key)
+            return
+        if retry_after:
+            raise _rate_limited(retry_after)
+
+    def close(self) -> None:
+        self.fallback.close()
+
 
+@lru_cache
+def get_rate_limiter() -> InMemoryRateLimiter | RedisRateLimiter:
+    """Process-wide limiter; Redis-backed whenever ``redis_url`` is configured."""
 
-async def get_rate_limiter() -> InMemoryRateLimiter:
     settings = get_settings()
-    return InMemoryRateLimiter(
-        max_requests=settings.rate_limit_max_requests,
-        window_seconds=settings.rate_limit_window_seconds,
-    )
+    options = {
+        "max_requests": settings.rate_limit_max_requests,
+        "window_seconds": settings.rate_limit_window_seconds,
+        "shards": settings.rate_limit_shards,
+        "sweep_interval_seconds": settings.rate_limit_sweep_interval_seconds,
+    }
+    redis = get_redis()
+    if redis is None:
+        return InMemoryRateLimiter(**options)
+    return RedisRateLimiter(redis, **options)
+
+
+def shutdown_rate_limiter() -> None:
+    if get_rate_limiter.cache_info().currsize:
+        get_rate_limiter().close()
+        get_rate_limiter.cache_clear()
 
 
-def rate_limiter(identifier_dependency: IdentifierDependency):
+def rate_limiter(identifier_dependency: IdentifierDependency, scope: str = "default"):
     async def dependency(
         identifier: str = Depends(identifier_dependency),
-        limiter: InMemoryRateLimiter = Depends(get_rate_limiter),
+        limiter: InMemoryRateLimiter | RedisRateLimiter = Depends(get_rate_limiter),
     ) -> None:
         if asyncio.iscoroutine(identifier):
             identifier_value = await identifier
         else:
             identifier_value = identifier
-        await limiter.check(identifier_value)
+        await limiter.check(f"{scope}:{identifier_value}")
 
     return dependency
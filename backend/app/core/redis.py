@@ -0,0 +1,55 @@
+import asyncio
+import logging
+from collections.abc import Coroutine
+from functools import lru_cache
+from typing import Any
+
+from redis.asyncio import Redis
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Strong references to scheduled writes; the event loop only keeps weak ones.
+_background_tasks: set[asyncio.Task] = set()
+
+
+@lru_cache
+def get_redis() -> Redis | None:
+    """Process-wide async Redis client, or None when ``redis_url`` is not configured."""
+
+    settings = get_settings()
+    if settings.redis_url is None:
+        return None
+    # Short timeouts: a stalled Redis should fail fast rather than hold requests open.
+    return Redis.from_url(
+        str(settings.redis_url),
+        decode_responses=True,
+        socket_timeout=settings.redis_socket_timeout_seconds,
+        socket_connect_timeout=settings.redis_connect_timeout_seconds,
+    )
+
+
+def schedule_redis_write(write: Coroutine[Any, Any, Any], description: str) -> asyncio.Task | None:
+    """Run ``write`` on the current loop from synchronous code such as SQLAlchemy hooks.
+
+    The task is kept referenced until it finishes and failures are logged. Without a
+    running loop the write is dropped (and reported) instead.
+    """
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        write.close()
+        logger.warning("%s skipped: no running event loop", description)
+        return None
+    task = loop.create_task(write)
+    _background_tasks.add(task)
+
+    def _done(finished: asyncio.Task) -> None:
+        _background_tasks.discard(finished)
+        if not finished.cancelled() and finished.exception() is not None:
+            logger.warning("%s failed: %s", description, finished.exception())
+
+    task.add_done_callback(_done)
+    return task
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from prometheus_client import CONTENT_TYPE_LATEST, Counter, generate_latest
 
 from app.core.config import get_settings
 from app.core.logging import configure_logging
+from app.core.rate_limit import shutdown_rate_limiter
 from app.routers import (
     bioimpedance,
     body_progress,
@@ -16,11 +19,20 @@ from app.routers import (
     reports,
     training,
 )
+from app.services.ai_pose import shutdown_pose_pool
 
 settings = get_settings()
 configure_logging(settings.log_level)
 
-app = FastAPI(title=settings.app_name)
+
+@asynccontextmanager
+async def _lifespan(_: FastAPI):
+    yield
+    shutdown_pose_pool()
+    shutdown_rate_limiter()
+
+
+app = FastAPI(title=settings.app_name, lifespan=_lifespan)
 
 app.add_middleware(
     CORSMiddleware,
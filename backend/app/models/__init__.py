@@ -1,4 +1,5 @@
 from app.models.base import Base
+from app.models.bioimpedance import BioimpedanceRecord
 from app.models.body import BodyComparison, BodyPhoto
 from app.models.user import User
 
@@ -7,4 +8,5 @@ __all__ = [
     "User",
     "BodyPhoto",
     "BodyComparison",
+    "BioimpedanceRecord",
 ]
@@ -0,0 +1,21 @@
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, Float, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class BioimpedanceRecord(Base):
+    __tablename__ = "bioimpedance_records"
+    __table_args__ = (
+        Index("ix_bioimpedance_records_user_measured_at", "user_id", "measured_at"),
+    )
+
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), nullable=False)
+    measured_at: Mapped[date] = mapped_column(Date, nullable=False)
+    weight_kg: Mapped[float] = mapped_column(Float, nullable=False)
+    fat_pct: Mapped[float] = mapped_column(Float, nullable=False)
+    muscle_pct: Mapped[float] = mapped_column(Float, nullable=False)
+    visceral_fat: Mapped[float | None] = mapped_column(Float)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
@@ -1,9 +1,17 @@
+import hashlib
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, JSON, String
+import numpy as np
+from sqlalchemy import DateTime, Float, ForeignKey, Index, JSON, LargeBinary, String, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base
+from app.models.keypoints import (
+    keypoints_to_dict,
+    pack_keypoints,
+    pose_features,
+    unpack_keypoints,
+)
 
 
 class BodyPhoto(Base):
@@ -19,8 +27,25 @@ class BodyPhoto(Base):
     pose_hint: Mapped[str | None] = mapped_column(String(128))
     taken_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
-    pose_keypoints: Mapped[dict | None] = mapped_column(JSON, default=None)
+    pose_keypoints_packed: Mapped[bytes | None] = mapped_column(LargeBinary, default=None)
+    keypoints_hash: Mapped[str | None] = mapped_column(String(64))
+    # Pose features derived from the keypoints whenever they are set (see pose_features).
+    torso_length: Mapped[float | None] = mapped_column(Float)
+    shoulders_ratio: Mapped[float | None] = mapped_column(Float)
+    hip_ratio: Mapped[float | None] = mapped_column(Float)
+    arm_ratio: Mapped[float | None] = mapped_column(Float)
+    shoulders_confidence: Mapped[float | None] = mapped_column(Float)
+    hip_confidence: Mapped[float | None] = mapped_column(Float)
+    arm_confidence: Mapped[float | None] = mapped_column(Float)
+    pose_confidence: Mapped[float | None] = mapped_column(Float)
+    shoulder_y: Mapped[float | None] = mapped_column(Float)
+    # Set when server-side pose estimation fails; the photo is not retried before then.
+    pose_retry_after: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    # SHA-256 of the uploaded original; derivative keys are addressed by it.
+    content_sha256: Mapped[str | None] = mapped_column(String(64))
     segmentation_key: Mapped[str | None] = mapped_column(String(1024))
+    thumbnail_key: Mapped[str | None] = mapped_column(String(1024))
+    compare_key: Mapped[str | None] = mapped_column(String(1024))
 
     user: Mapped["User"] = relationship(back_populates="body_photos")
     comparisons_from: Mapped[list["BodyComparison"]] = relationship(
@@ -30,14 +55,68 @@ class BodyPhoto(Base):
         back_populates="to_photo", foreign_keys="BodyComparison.to_photo_id"
     )
 
+    @property
+    def keypoints_array(self) -> np.ndarray | None:
+        return unpack_keypoints(self.pose_keypoints_packed)
+
+    @property
+    def pose_keypoints(self) -> dict | None:
+        """Compatibility accessor exposing the packed keypoints in ``{name: {x, y, confidence}}`` form."""
+
+        return keypoints_to_dict(self.keypoints_array)
+
+    @pose_keypoints.setter
+    def pose_keypoints(self, value: dict | None) -> None:
+        self.pose_keypoints_packed = pack_keypoints(value)
+
+
+Index(
+    "ix_body_photos_user_view_taken_at",
+    BodyPhoto.user_id,
+    BodyPhoto.view,
+    BodyPhoto.taken_at.desc(),
+)
+
+
+def fingerprint_keypoints(packed: bytes | None) -> str | None:
+    if packed is None:
+        return None
+    return hashlib.sha256(packed).hexdigest()
+
+
+@event.listens_for(BodyPhoto.pose_keypoints_packed, "set")
+def _refresh_keypoint_columns(target: BodyPhoto, value: bytes | None, oldvalue, initiator) -> None:
+    target.keypoints_hash = fingerprint_keypoints(value)
+    if value is not None:
+        target.pose_retry_after = None
+    for column, feature in pose_features(unpack_keypoints(value)).items():
+        setattr(target, column, feature)
+
 
 class BodyComparison(Base):
     __tablename__ = "body_comparisons"
+    __table_args__ = (
+        Index(
+            "ux_body_comparisons_user_pair",
+            "user_id",
+            "from_photo_id",
+            "to_photo_id",
+            unique=True,
+        ),
+        Index("ix_body_comparisons_user_created_at", "user_id", "created_at"),
+    )
 
     user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), nullable=False)
     from_photo_id: Mapped[str] = mapped_column(ForeignKey("body_photos.id"), nullable=False)
     to_photo_id: Mapped[str] = mapped_column(ForeignKey("body_photos.id"), nullable=False)
     result: Mapped[dict] = mapped_column(JSON, nullable=False)
+    # Numeric copies of ``result`` for SQL aggregation; kept in sync by _refresh_metric_columns.
+    delta_waist_pct: Mapped[float | None] = mapped_column(Float)
+    delta_hip_pct: Mapped[float | None] = mapped_column(Float)
+    delta_shoulders_pct: Mapped[float | None] = mapped_column(Float)
+    delta_arm_pct: Mapped[float | None] = mapped_column(Float)
+    confidence: Mapped[float | None] = mapped_column(Float)
+    keypoints_hash: Mapped[str | None] = mapped_column(String(64))
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
 
     user: Mapped["User"] = relationship(back_populates="body_comparisons")
@@ -49,4 +128,20 @@ class BodyComparison(Base):
     )
 
 
+COMPARISON_METRIC_COLUMNS = (
+    "delta_waist_pct",
+    "delta_hip_pct",
+    "delta_shoulders_pct",
+    "delta_arm_pct",
+)
+
+
+@event.listens_for(BodyComparison.result, "set")
+def _refresh_metric_columns(target: BodyComparison, value: dict | None, oldvalue, initiator) -> None:
+    metrics = (value or {}).get("metrics", {})
+    for column in COMPARISON_METRIC_COLUMNS:
+        setattr(target, column, metrics.get(column))
+    target.confidence = (value or {}).get("confidence")
+
+
 from app.models.user import User  # noqa: E402
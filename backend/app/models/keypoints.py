@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from math import isnan
+from typing import Mapping
+
+import numpy as np
+
+
+# Storage order of the packed keypoint array; append new names at the end only,
+# existing rows are decoded positionally.
+KEYPOINT_NAMES: tuple[str, ...] = (
+    "nose",
+    "neck",
+    "right_shoulder",
+    "right_elbow",
+    "right_wrist",
+    "left_shoulder",
+    "left_elbow",
+    "left_wrist",
+    "mid_hip",
+    "right_hip",
+    "right_knee",
+    "right_ankle",
+    "left_hip",
+    "left_knee",
+    "left_ankle",
+)
+
+KEYPOINT_INDEX = {name: index for index, name in enumerate(KEYPOINT_NAMES)}
+KEYPOINT_DTYPE = np.dtype("<f4")
+
+
+def pack_keypoints(keypoints: Mapping[str, Mapping[str, float]] | None) -> bytes | None:
+    """Encode ``{name: {x, y, confidence}}`` as little-endian float32 x/y/confidence triples.
+
+    Missing keypoints are stored as NaN and names outside ``KEYPOINT_NAMES`` are dropped.
+    """
+
+    if keypoints is None:
+        return None
+    packed = np.full((len(KEYPOINT_NAMES), 3), np.nan, dtype=KEYPOINT_DTYPE)
+    for name, point in keypoints.items():
+        index = KEYPOINT_INDEX.get(name)
+        if index is not None:
+            packed[index] = (point["x"], point["y"], point.get("confidence", 0.0))
+    return packed.tobytes()
+
+
+def unpack_keypoints(packed: bytes | None) -> np.ndarray | None:
+    """Return a read-only ``(len(KEYPOINT_NAMES), 3)`` view over ``packed`` without copying."""
+
+    if packed is None:
+        return None
+    return np.frombuffer(packed, dtype=KEYPOINT_DTYPE).reshape(-1, 3)
+
+
+def keypoints_to_dict(array: np.ndarray | None) -> dict[str, dict[str, float]] | None:
+    if array is None:
+        return None
+    return {
+        name: {"x": x, "y": y, "confidence": confidence}
+        for name, (x, y, confidence) in zip(KEYPOINT_NAMES, array.tolist())
+        if not isnan(x)
+    }
+
+
+# Distinct body segments whose widths are tracked per photo.
+FEATURE_SEGMENTS: dict[str, tuple[str, str]] = {
+    "shoulders": ("left_shoulder", "right_shoulder"),
+    "hip": ("left_hip", "right_hip"),
+    "arm": ("left_elbow", "right_elbow"),
+}
+
+
+@dataclass
+class PoseGeometry:
+    torso_length: np.ndarray
+    normalized_widths: np.ndarray
+    segment_confidence: np.ndarray
+    shoulder_y: np.ndarray
+
+
+def pose_geometry(stacked: np.ndarray, segments: Mapping[str, tuple[str, str]]) -> PoseGeometry:
+    """Torso length, torso-normalized segment widths and segment confidences for ``(N, K, 3)`` input.
+
+    Unavailable widths are NaN; a segment's confidence averages whichever endpoints exist.
+    """
+
+    left = np.array([KEYPOINT_INDEX[start] for start, _ in segments.values()], dtype=np.intp)
+    right = np.array([KEYPOINT_INDEX[end] for _, end in segments.values()], dtype=np.intp)
+    xy = stacked[..., :2]
+    torso = np.sqrt(
+        ((xy[:, KEYPOINT_INDEX["neck"]] - xy[:, KEYPOINT_INDEX["mid_hip"]]) ** 2).sum(axis=-1)
+    )
+    widths = np.sqrt(((xy[:, left] - xy[:, right]) ** 2).sum(axis=-1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        normalized = widths / torso[:, None]
+    normalized[~np.isfinite(normalized)] = np.nan
+
+    confidences = stacked[..., 2]
+    endpoints = np.stack((confidences[:, left], confidences[:, right]), axis=-1)
+    present = ~np.isnan(endpoints)
+    counts = present.sum(axis=-1)
+    totals = np.where(present, endpoints, 0.0).sum(axis=-1)
+    segment_confidence = np.divide(totals, counts, out=np.zeros_like(totals), where=counts > 0)
+
+    return PoseGeometry(
+        torso_length=torso,
+        normalized_widths=normalized,
+        segment_confidence=segment_confidence,
+        shoulder_y=xy[:, KEYPOINT_INDEX["left_shoulder"], 1],
+    )
+
+
+def pose_features(array: np.ndarray | None) -> dict[str, float | None]:
+    """Column values for ``BodyPhoto``'s precomputed pose features (all None without keypoints)."""
+
+    columns = [
+        "torso_length",
+        *(f"{name}_ratio" for name in FEATURE_SEGMENTS),
+        *(f"{name}_confidence" for name in FEATURE_SEGMENTS),
+        "pose_confidence",
+        "shoulder_y",
+    ]
+    if array is None:
+        return dict.fromkeys(columns)
+
+    geometry = pose_geometry(array[None].astype(np.float64), FEATURE_SEGMENTS)
+    confidences = geometry.segment_confidence[0].tolist()
+    values = [
+        geometry.torso_length[0],
+        *geometry.normalized_widths[0],
+        *confidences,
+        min(confidences),
+        geometry.shoulder_y[0],
+    ]
+    return {
+        column: None if isnan(value) else float(value) for column, value in zip(columns, values)
+    }
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from datetime import date
 
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_session
 from app.core.deps import get_current_user
 from app.models import User
 from app.schemas.bioimpedance import (
     BioimpedanceCreateRequest,
+    BioimpedanceImportResponse,
     BioimpedanceResponse,
     BioimpedanceSummaryResponse,
     BioimpedanceUpdateRequest,
@@ -20,21 +25,67 @@ service = BioimpedanceService()
 async def create_record(
     payload: BioimpedanceCreateRequest,
     user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> BioimpedanceResponse:
-    return service.create(str(user.id), payload)
+    return await service.create(session, str(user.id), payload)
+
+
+@router.post("/import", response_model=BioimpedanceImportResponse)
+async def import_records(
+    request: Request,
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> BioimpedanceImportResponse:
+    """Import a scale-vendor CSV export sent as the raw request body (``text/csv``).
+
+    Files without a usable header are rejected with 422; bad rows are reported per line.
+    """
+
+    try:
+        return await service.import_csv(session, str(user.id), request.stream())
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)
+        ) from exc
 
 
 @router.get("/", response_model=list[BioimpedanceResponse])
-async def list_records(user: User = Depends(get_current_user)) -> list[BioimpedanceResponse]:
-    return service.list(str(user.id))
+async def list_records(
+    start: date | None = Query(default=None, alias="from"),
+    end: date | None = Query(default=None, alias="to"),
+    limit: int | None = Query(
+        default=None, ge=1, le=5000, description="Return at most this many records; all by default"
+    ),
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> list[BioimpedanceResponse]:
+    """Records in ``measured_at`` order, optionally restricted to a date range.
+
+    The full matching history is returned unless ``limit`` is given.
+    """
+
+    return await service.list(session, str(user.id), start=start, end=end, limit=limit)
+
+
+@router.get("/summary", response_model=BioimpedanceSummaryResponse)
+async def summary(
+    include_points: bool = Query(default=True),
+    max_points: int | None = Query(default=None, ge=3, le=2000),
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> BioimpedanceSummaryResponse:
+    return await service.summary(
+        session, str(user.id), include_points=include_points, max_points=max_points
+    )
 
 
 @router.get("/{record_id}", response_model=BioimpedanceResponse)
 async def get_record(
     record_id: str,
     user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> BioimpedanceResponse:
-    record = service.get(str(user.id), record_id)
+    record = await service.get(session, str(user.id), record_id)
     if not record:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Record not found")
     return record
@@ -45,8 +96,9 @@ async def update_record(
     record_id: str,
     payload: BioimpedanceUpdateRequest,
     user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> BioimpedanceResponse:
-    record = service.update(str(user.id), record_id, payload)
+    record = await service.update(session, str(user.id), record_id, payload)
     if not record:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Record not found")
     return record
@@ -56,14 +108,10 @@ async def update_record(
 async def delete_record(
     record_id: str,
     user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> Response:
-    deleted = service.delete(str(user.id), record_id)
+    deleted = await service.delete(session, str(user.id), record_id)
     if not deleted:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Record not found")
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
-
-
-@router.get("/summary", response_model=BioimpedanceSummaryResponse)
-async def summary(user: User = Depends(get_current_user)) -> BioimpedanceSummaryResponse:
-    return service.summary(str(user.id))
@@ -1,15 +1,31 @@
 from __future__ import annotations
 
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Sequence
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import BigInteger, and_, case, cast, extract, func, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import joinedload
 
-from app.core.deps import get_current_user
-from app.core.database import get_session
+from app.core.deps import get_current_user, get_read_session
+from app.core.database import get_session, get_session_factory
 from app.models import BodyComparison, BodyPhoto, User
+from app.models.body import COMPARISON_METRIC_COLUMNS
 from app.schemas.body_progress import (
+    BodyBestMatchResponse,
+    BodyComparisonBatchRequest,
+    BodyComparisonBatchResponse,
+    BodyComparisonListItem,
+    BodyComparisonListResponse,
+    BodyPhotoBatchUploadRequest,
+    BodyPhotoBatchUploadResponse,
+    BodyPhotoDerivativesResponse,
     BodyComparisonPairResponse,
     BodyComparisonRequest,
     BodyComparisonResponse,
@@ -18,31 +34,116 @@ from app.schemas.body_progress import (
     BodyPhotoListResponse,
     BodyPhotoUploadRequest,
     BodyPhotoUploadResponse,
+    BodyTimelineEntry,
+    BodyTimelineResponse,
+    BodyTrendResponse,
+    BodyTrendSlopes,
+    BodyTrendWindow,
     BodyView,
 )
-from app.services.ai_pose import PoseEstimator, get_keypoints
-from app.services.body_compare import BodyComparisonService
-from app.services.storage import StorageService
+from app.core.config import get_settings
+from app.services.ai_pose import PoseEstimationError, PoseEstimator
+from app.services.body_compare import (
+    BodyComparisonService,
+    BodyMetricResult,
+    comparison_fingerprint,
+)
+from app.services.derivatives import process_photo_derivatives
+from app.services.photo_index import PhotoIndexCache, get_photo_index, photo_features
+from app.services.storage import StorageService, get_storage_service
 
 router = APIRouter(prefix="/body-progress", tags=["body-progress"])
 
+# Extra commit attempts when concurrent writers keep storing the same comparisons first.
+BATCH_CONFLICT_RETRIES = 2
+
 
 def _build_storage_key(user: User, file_name: str) -> str:
     safe_name = file_name.replace(" ", "_")
     return f"users/{user.id}/body/{uuid4()}_{safe_name}"
 
 
-@router.post("/upload", response_model=BodyPhotoUploadResponse, status_code=status.HTTP_201_CREATED)
-async def request_body_photo_upload(
-    payload: BodyPhotoUploadRequest,
-    user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session),
-) -> BodyPhotoUploadResponse:
-    storage = StorageService()
-    key = _build_storage_key(user, payload.file_name)
-    presigned = storage.generate_presigned_upload(key=key)
+def _encode_cursor(position: datetime, row_id: str) -> str:
+    raw = json.dumps([position.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position, row_id = json.loads(raw)
+        return datetime.fromisoformat(position), str(row_id)
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+
+
+def _photo_item(photo: BodyPhoto, storage: StorageService) -> BodyPhotoItem:
+    try:
+        download_url = storage.generate_presigned_download(
+            storage.object_key_from_url(photo.file_url)
+        )
+    except ValueError:
+        download_url = None
+    return BodyPhotoItem(
+        id=photo.id,
+        view=photo.view,
+        file_url=photo.file_url,
+        taken_at=photo.taken_at,
+        download_url=download_url,
+        thumbnail_url=(
+            storage.generate_presigned_download(photo.thumbnail_key) if photo.thumbnail_key else None
+        ),
+        compare_url=(
+            storage.generate_presigned_download(photo.compare_key) if photo.compare_key else None
+        ),
+    )
+
+
+def _preview_url(photo: BodyPhoto, storage: StorageService) -> str:
+    if photo.thumbnail_key:
+        return storage.generate_presigned_download(photo.thumbnail_key)
+    try:
+        return storage.generate_presigned_download(storage.object_key_from_url(photo.file_url))
+    except ValueError:
+        return photo.file_url
 
-    photo = BodyPhoto(
+
+def _pair_comparison_query(user: User, from_id: str, to_id: str):
+    return select(BodyComparison).where(
+        BodyComparison.user_id == user.id,
+        BodyComparison.from_photo_id == from_id,
+        BodyComparison.to_photo_id == to_id,
+    )
+
+
+def _serialize_result(metrics: BodyMetricResult) -> dict:
+    return {
+        "metrics": {
+            "delta_waist_pct": metrics.delta_waist_pct,
+            "delta_hip_pct": metrics.delta_hip_pct,
+            "delta_shoulders_pct": metrics.delta_shoulders_pct,
+            "delta_arm_pct": metrics.delta_arm_pct,
+            "fat_change_hint": metrics.fat_change_hint,
+            "posture_change_hint": metrics.posture_change_hint,
+        },
+        "confidence": metrics.confidence,
+        "verdict": metrics.verdict,
+    }
+
+
+def _comparison_response(comparison: BodyComparison) -> BodyComparisonResponse:
+    return BodyComparisonResponse(
+        comparison_id=comparison.id,
+        metrics=BodyMetrics(**comparison.result["metrics"]),
+        confidence=comparison.result["confidence"],
+        verdict=comparison.result["verdict"],
+    )
+
+
+def _new_photo(
+    user: User, payload: BodyPhotoUploadRequest, storage: StorageService, key: str
+) -> BodyPhoto:
+    return BodyPhoto(
         user_id=user.id,
         view=payload.view,
         file_url=storage.build_object_url(key),
@@ -52,11 +153,122 @@ async def request_body_photo_upload(
         clothing=payload.clothing,
         pose_hint=payload.pose_hint,
         taken_at=payload.timestamp,
-        pose_keypoints=payload.pose_keypoints,
+        pose_keypoints=(
+            {name: point.model_dump() for name, point in payload.pose_keypoints.items()}
+            if payload.pose_keypoints is not None and get_settings().pose_trust_client_keypoints
+            else None
+        ),
+    )
+
+
+async def _ensure_keypoints(
+    session: AsyncSession, estimator: PoseEstimator, photos: Sequence[BodyPhoto]
+) -> None:
+    """Estimate missing keypoints and commit them, or the retry marks of failed photos (422)."""
+
+    try:
+        await estimator.ensure_keypoints(photos)
+    except PoseEstimationError as exc:
+        if session.dirty:
+            await session.commit()
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
+    if session.dirty:
+        await session.commit()
+
+
+async def _refresh_comparisons(
+    session: AsyncSession,
+    user: User,
+    service: BodyComparisonService,
+    comparisons: dict[tuple[str, str], BodyComparison],
+    pairs: list[tuple[BodyPhoto, BodyPhoto]],
+) -> None:
+    """Recompute pairs whose stored comparison is missing or stale in one vectorized pass.
+
+    New rows are added to the session and to ``comparisons``; the caller commits.
+    """
+
+    stale = []
+    for previous, current in pairs:
+        stored = comparisons.get((previous.id, current.id))
+        fingerprint = comparison_fingerprint(previous, current)
+        if stored is None or stored.keypoints_hash != fingerprint:
+            stale.append((previous, current, fingerprint))
+
+    if stale:
+        involved = list({
+            photo.id: photo for previous, current, _ in stale for photo in (previous, current)
+        }.values())
+        index = {photo.id: position for position, photo in enumerate(involved)}
+        results = await service.analyze_photos(
+            photos=involved,
+            pairs=[(index[previous.id], index[current.id]) for previous, current, _ in stale],
+        )
+        for (previous, current, fingerprint), metrics in zip(stale, results):
+            comparison = comparisons.get((previous.id, current.id))
+            if comparison is None:
+                comparison = BodyComparison(
+                    user_id=user.id,
+                    from_photo_id=previous.id,
+                    to_photo_id=current.id,
+                )
+                session.add(comparison)
+                comparisons[(previous.id, current.id)] = comparison
+            comparison.result = _serialize_result(metrics)
+            comparison.keypoints_hash = fingerprint
+
+
+async def _store_comparisons(
+    session: AsyncSession,
+    user: User,
+    service: BodyComparisonService,
+    existing_stmt,
+    pairs: list[tuple[BodyPhoto, BodyPhoto]],
+) -> dict[tuple[str, str], BodyComparison]:
+    """Load stored comparisons for ``pairs``, compute the missing or stale ones and commit.
+
+    A concurrent request may store some of the same pairs first (the unique index then
+    rejects the commit); the stored rows are reloaded and only what is still missing is
+    recomputed, up to ``BATCH_CONFLICT_RETRIES`` times before answering 409.
+    """
+
+    photo_ids = {photo.id for pair in pairs for photo in pair}
+    for _ in range(BATCH_CONFLICT_RETRIES + 1):
+        comparisons = {
+            (row.from_photo_id, row.to_photo_id): row
+            for row in (await session.scalars(existing_stmt)).all()
+        }
+        await _refresh_comparisons(session, user, service, comparisons, pairs)
+        if not (session.new or session.dirty):
+            return comparisons
+        try:
+            await session.commit()
+            return comparisons
+        except IntegrityError:
+            await session.rollback()
+            # The rollback expired the photos; reload them before recomputing.
+            await session.scalars(select(BodyPhoto).where(BodyPhoto.id.in_(photo_ids)))
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Comparisons are being written concurrently; retry the request",
     )
+
+
+@router.post("/upload", response_model=BodyPhotoUploadResponse, status_code=status.HTTP_201_CREATED)
+async def request_body_photo_upload(
+    payload: BodyPhotoUploadRequest,
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+    storage: StorageService = Depends(get_storage_service),
+    photo_index: PhotoIndexCache = Depends(get_photo_index),
+) -> BodyPhotoUploadResponse:
+    key = _build_storage_key(user, payload.file_name)
+    presigned = await run_in_threadpool(storage.generate_presigned_upload, key=key)
+
+    photo = _new_photo(user, payload, storage, key)
     session.add(photo)
     await session.commit()
-    await session.refresh(photo)
+    photo_index.observe(photo)
 
     return BodyPhotoUploadResponse(
         photo_id=photo.id,
@@ -65,19 +277,137 @@ async def request_body_photo_upload(
     )
 
 
+@router.post(
+    "/upload/batch",
+    response_model=BodyPhotoBatchUploadResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def request_body_photo_batch_upload(
+    payload: BodyPhotoBatchUploadRequest,
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+    storage: StorageService = Depends(get_storage_service),
+    photo_index: PhotoIndexCache = Depends(get_photo_index),
+) -> BodyPhotoBatchUploadResponse:
+    keys = [_build_storage_key(user, item.file_name) for item in payload.items]
+    presigned = await run_in_threadpool(
+        lambda: [storage.generate_presigned_upload(key=key) for key in keys]
+    )
+
+    photos = [_new_photo(user, item, storage, key) for item, key in zip(payload.items, keys)]
+    session.add_all(photos)
+    await session.commit()
+    for photo in photos:
+        photo_index.observe(photo)
+
+    return BodyPhotoBatchUploadResponse(
+        items=[
+            BodyPhotoUploadResponse(
+                photo_id=photo.id,
+                upload_url=post["url"],
+                fields=post["fields"],
+            )
+            for photo, post in zip(photos, presigned)
+        ]
+    )
+
+
+@router.post(
+    "/photos/{photo_id}/derivatives",
+    response_model=BodyPhotoDerivativesResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def request_photo_derivatives(
+    photo_id: str,
+    background_tasks: BackgroundTasks,
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+    storage: StorageService = Depends(get_storage_service),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_session_factory),
+) -> BodyPhotoDerivativesResponse:
+    """Called by clients once the presigned upload finished; renders variants in the background."""
+
+    found = await session.scalar(
+        select(BodyPhoto.id).where(BodyPhoto.user_id == user.id, BodyPhoto.id == photo_id)
+    )
+    if found is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Photo not found")
+    background_tasks.add_task(process_photo_derivatives, session_factory, storage, user.id, [photo_id])
+    return BodyPhotoDerivativesResponse(photo_id=photo_id)
+
+
 @router.get("/list", response_model=BodyPhotoListResponse)
 async def list_body_photos(
     view: BodyView | None = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: str | None = Query(default=None),
+    min_confidence: float | None = Query(default=None, ge=0, le=1),
     user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
+    storage: StorageService = Depends(get_storage_service),
 ) -> BodyPhotoListResponse:
     stmt = select(BodyPhoto).where(BodyPhoto.user_id == user.id)
     if view:
         stmt = stmt.where(BodyPhoto.view == view)
-    stmt = stmt.order_by(BodyPhoto.taken_at.desc())
+    if min_confidence is not None:
+        stmt = stmt.where(BodyPhoto.pose_confidence >= min_confidence)
+    if cursor:
+        taken_at, photo_id = _decode_cursor(cursor)
+        stmt = stmt.where(
+            or_(
+                BodyPhoto.taken_at < taken_at,
+                and_(BodyPhoto.taken_at == taken_at, BodyPhoto.id < photo_id),
+            )
+        )
+    stmt = stmt.order_by(BodyPhoto.taken_at.desc(), BodyPhoto.id.desc()).limit(limit + 1)
     photos = (await session.scalars(stmt)).all()
-    items = [BodyPhotoItem.model_validate(photo) for photo in photos]
-    return BodyPhotoListResponse(items=items)
+
+    next_cursor = None
+    if len(photos) > limit:
+        photos = photos[:limit]
+        next_cursor = _encode_cursor(photos[-1].taken_at, photos[-1].id)
+    items = [_photo_item(photo, storage) for photo in photos]
+    return BodyPhotoListResponse(items=items, next_cursor=next_cursor)
+
+
+@router.get("/comparisons", response_model=BodyComparisonListResponse)
+async def list_body_comparisons(
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = Query(default=None),
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session),
+    storage: StorageService = Depends(get_storage_service),
+) -> BodyComparisonListResponse:
+    stmt = (
+        select(BodyComparison)
+        .where(BodyComparison.user_id == user.id)
+        .options(joinedload(BodyComparison.from_photo), joinedload(BodyComparison.to_photo))
+    )
+    if cursor:
+        created_at, comparison_id = _decode_cursor(cursor)
+        stmt = stmt.where(
+            or_(
+                BodyComparison.created_at < created_at,
+                and_(BodyComparison.created_at == created_at, BodyComparison.id < comparison_id),
+            )
+        )
+    stmt = stmt.order_by(BodyComparison.created_at.desc(), BodyComparison.id.desc()).limit(limit + 1)
+    comparisons = (await session.scalars(stmt)).all()
+
+    next_cursor = None
+    if len(comparisons) > limit:
+        comparisons = comparisons[:limit]
+        next_cursor = _encode_cursor(comparisons[-1].created_at, comparisons[-1].id)
+    items = [
+        BodyComparisonListItem(
+            id=comparison.id,
+            from_photo_url=_preview_url(comparison.from_photo, storage),
+            to_photo_url=_preview_url(comparison.to_photo, storage),
+            created_at=comparison.created_at,
+        )
+        for comparison in comparisons
+    ]
+    return BodyComparisonListResponse(items=items, next_cursor=next_cursor)
 
 
 @router.get("/compare/{from_id}/{to_id}", response_model=BodyComparisonPairResponse)
@@ -85,7 +415,8 @@ async def get_comparison_pair(
     from_id: str,
     to_id: str,
     user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
+    storage: StorageService = Depends(get_storage_service),
 ) -> BodyComparisonPairResponse:
     photos = (await session.scalars(
         select(BodyPhoto).where(
@@ -97,8 +428,54 @@ async def get_comparison_pair(
     if from_id not in photo_map or to_id not in photo_map:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Photos not found")
     return BodyComparisonPairResponse(
-        from_photo=BodyPhotoItem.model_validate(photo_map[from_id]),
-        to_photo=BodyPhotoItem.model_validate(photo_map[to_id]),
+        from_photo=_photo_item(photo_map[from_id], storage),
+        to_photo=_photo_item(photo_map[to_id], storage),
+    )
+
+
+@router.get("/best-match/{photo_id}", response_model=BodyBestMatchResponse)
+async def get_best_match(
+    photo_id: str,
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+    storage: StorageService = Depends(get_storage_service),
+    pose_estimator: PoseEstimator = Depends(PoseEstimator),
+    photo_index: PhotoIndexCache = Depends(get_photo_index),
+) -> BodyBestMatchResponse:
+    """Earlier photo of the same view whose capture setup and pose are closest to ``photo_id``."""
+
+    photo = await session.scalar(
+        select(BodyPhoto).where(BodyPhoto.user_id == user.id, BodyPhoto.id == photo_id)
+    )
+    if photo is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Photo not found")
+    await _ensure_keypoints(session, pose_estimator, [photo])
+    point = photo_features(photo)
+    if point is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Pose features unavailable for this photo",
+        )
+
+    tree = await photo_index.get(session, user.id, photo.view)
+    while True:
+        found = tree.nearest_before(point, photo.taken_at, exclude=photo.id)
+        if found is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="No earlier comparable photo"
+            )
+        match = await session.scalar(
+            select(BodyPhoto).where(BodyPhoto.user_id == user.id, BodyPhoto.id == found.photo_id)
+        )
+        if match is not None:
+            break
+        # The indexed photo is gone (or its insert never committed); forget it and retry.
+        photo_index.discard(user.id, photo.view, found.photo_id)
+
+    return BodyBestMatchResponse(
+        photo_id=photo.id,
+        match=_photo_item(match, storage),
+        distance=found.distance,
     )
 
 
@@ -122,48 +499,211 @@ async def analyze_body_progress(
 
     from_photo = photo_map[payload.from_id]
     to_photo = photo_map[payload.to_id]
+    await _ensure_keypoints(session, pose_estimator, [from_photo, to_photo])
+    fingerprint = comparison_fingerprint(from_photo, to_photo)
+
+    comparison = await session.scalar(_pair_comparison_query(user, from_photo.id, to_photo.id))
+    if comparison is not None and comparison.keypoints_hash == fingerprint:
+        return _comparison_response(comparison)
+
+    [metrics] = await service.analyze_photos(photos=[from_photo, to_photo], pairs=[(0, 1)])
+
+    if comparison is None:
+        comparison = BodyComparison(
+            user_id=user.id,
+            from_photo_id=from_photo.id,
+            to_photo_id=to_photo.id,
+        )
+        session.add(comparison)
+    comparison.result = _serialize_result(metrics)
+    comparison.keypoints_hash = fingerprint
+    try:
+        await session.commit()
+    except IntegrityError:
+        # A concurrent request stored the same pair first; serve its result.
+        await session.rollback()
+        comparison = await session.scalar(
+            _pair_comparison_query(user, from_photo.id, to_photo.id)
+        )
+
+    return _comparison_response(comparison)
 
-    from_keypoints = await get_keypoints(from_photo, pose_estimator)
-    to_keypoints = await get_keypoints(to_photo, pose_estimator)
 
-    metrics = await service.analyze(
-        from_photo=from_photo,
-        to_photo=to_photo,
-        from_keypoints=from_keypoints,
-        to_keypoints=to_keypoints,
+@router.post("/analyze/batch", response_model=BodyComparisonBatchResponse)
+async def analyze_body_progress_batch(
+    payload: BodyComparisonBatchRequest,
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+    pose_estimator: PoseEstimator = Depends(PoseEstimator),
+    service: BodyComparisonService = Depends(BodyComparisonService),
+) -> BodyComparisonBatchResponse:
+    requested = [(pair.from_id, pair.to_id) for pair in payload.pairs]
+    photo_ids = {photo_id for pair in requested for photo_id in pair}
+    photos = (await session.scalars(
+        select(BodyPhoto).where(BodyPhoto.user_id == user.id, BodyPhoto.id.in_(photo_ids))
+    )).all()
+    photo_map = {photo.id: photo for photo in photos}
+    missing = photo_ids - photo_map.keys()
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Photos not found: {', '.join(sorted(missing))}",
+        )
+    await _ensure_keypoints(session, pose_estimator, photos)
+
+    unique_pairs = list(dict.fromkeys(requested))
+    comparisons = await _store_comparisons(
+        session,
+        user,
+        service,
+        select(BodyComparison).where(
+            BodyComparison.user_id == user.id,
+            BodyComparison.from_photo_id.in_({from_id for from_id, _ in unique_pairs}),
+            BodyComparison.to_photo_id.in_({to_id for _, to_id in unique_pairs}),
+        ),
+        [(photo_map[from_id], photo_map[to_id]) for from_id, to_id in unique_pairs],
     )
 
-    comparison = BodyComparison(
-        user_id=user.id,
-        from_photo_id=from_photo.id,
-        to_photo_id=to_photo.id,
-        result={
-            "metrics": {
-                "delta_waist_pct": metrics.delta_waist_pct,
-                "delta_hip_pct": metrics.delta_hip_pct,
-                "delta_shoulders_pct": metrics.delta_shoulders_pct,
-                "delta_arm_pct": metrics.delta_arm_pct,
-                "fat_change_hint": metrics.fat_change_hint,
-                "posture_change_hint": metrics.posture_change_hint,
-            },
-            "confidence": metrics.confidence,
-            "verdict": metrics.verdict,
-        },
+    return BodyComparisonBatchResponse(
+        items=[_comparison_response(comparisons[pair]) for pair in requested]
     )
-    session.add(comparison)
-    await session.commit()
-    await session.refresh(comparison)
 
-    return BodyComparisonResponse(
-        comparison_id=comparison.id,
-        metrics=BodyMetrics(
-            delta_waist_pct=metrics.delta_waist_pct,
-            delta_hip_pct=metrics.delta_hip_pct,
-            delta_shoulders_pct=metrics.delta_shoulders_pct,
-            delta_arm_pct=metrics.delta_arm_pct,
-            fat_change_hint=metrics.fat_change_hint,
-            posture_change_hint=metrics.posture_change_hint,
+
+@router.get("/timeline", response_model=BodyTimelineResponse)
+async def get_body_progress_timeline(
+    view: BodyView | None = Query(default=None),
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+    service: BodyComparisonService = Depends(BodyComparisonService),
+) -> BodyTimelineResponse:
+    """Chain of consecutive comparisons per view over photos that already have keypoints.
+
+    This endpoint is polled, so it never estimates keypoints itself; that happens when
+    derivatives are requested after upload, or on /analyze.
+    """
+
+    stmt = select(BodyPhoto).where(
+        BodyPhoto.user_id == user.id, BodyPhoto.pose_keypoints_packed.is_not(None)
+    )
+    if view:
+        stmt = stmt.where(BodyPhoto.view == view)
+    stmt = stmt.order_by(BodyPhoto.view, BodyPhoto.taken_at, BodyPhoto.id)
+    photos = (await session.scalars(stmt)).all()
+
+    pairs = [
+        (previous, current)
+        for previous, current in zip(photos, photos[1:])
+        if previous.view == current.view
+    ]
+
+    comparisons = await _store_comparisons(
+        session,
+        user,
+        service,
+        select(BodyComparison).where(
+            BodyComparison.user_id == user.id,
+            BodyComparison.to_photo_id.in_([current.id for _, current in pairs]),
         ),
-        confidence=metrics.confidence,
-        verdict=metrics.verdict,
+        pairs,
+    )
+
+    items = []
+    for previous, current in pairs:
+        response = _comparison_response(comparisons[(previous.id, current.id)])
+        items.append(
+            BodyTimelineEntry(
+                view=current.view,
+                from_id=previous.id,
+                to_id=current.id,
+                comparison_id=response.comparison_id,
+                metrics=response.metrics,
+                confidence=response.confidence,
+                verdict=response.verdict,
+            )
+        )
+    return BodyTimelineResponse(items=items)
+
+
+def _least_squares_slope(n: float, sx: float, sy: float, sxy: float, sxx: float) -> float | None:
+    denominator = n * sxx - sx * sx
+    if n < 2 or abs(denominator) < 1e-12:
+        return None
+    return (n * sxy - sx * sy) / denominator
+
+
+@router.get("/trends", response_model=BodyTrendResponse)
+async def get_body_progress_trends(
+    view: BodyView | None = Query(default=None),
+    window_days: int = Query(default=7, ge=1, le=365),
+    days: int = Query(default=180, ge=1, le=1825),
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session),
+) -> BodyTrendResponse:
+    """Per-window metric averages and overall slopes, aggregated in a single SQL query."""
+
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    # Seconds since ``since``; measuring x in days from there keeps the regression sums well conditioned.
+    offset = cast(extract("epoch", BodyPhoto.taken_at), BigInteger) - int(since.timestamp())
+    x = offset / 86400.0
+    metrics = [getattr(BodyComparison, column) for column in COMPARISON_METRIC_COLUMNS]
+
+    def _metric_sums(metric):
+        # Each metric has its own NULLs, so it gets its own count and x sums.
+        present = metric.is_not(None)
+        return (
+            func.count(metric),
+            func.sum(case((present, x))),
+            func.sum(case((present, x * x))),
+            func.sum(metric),
+            func.sum(x * metric),
+        )
+
+    stmt = (
+        select(
+            (offset // (window_days * 86400)).label("bucket"),
+            func.count().label("n"),
+            func.avg(BodyComparison.confidence),
+            *(aggregate for metric in metrics for aggregate in _metric_sums(metric)),
+        )
+        .join(BodyPhoto, BodyPhoto.id == BodyComparison.to_photo_id)
+        .where(
+            BodyComparison.user_id == user.id,
+            BodyComparison.confidence.is_not(None),
+            BodyPhoto.taken_at >= since,
+        )
+        .group_by("bucket")
+        .order_by("bucket")
+    )
+    if view:
+        stmt = stmt.where(BodyPhoto.view == view)
+    rows = (await session.execute(stmt)).all()
+
+    windows = []
+    # Per metric: count, sum x, sum x^2, sum y, sum x*y over every window.
+    totals = {column: [0.0] * 5 for column in COMPARISON_METRIC_COLUMNS}
+    for bucket, n, confidence, *sums in rows:
+        means = {}
+        for index, column in enumerate(COMPARISON_METRIC_COLUMNS):
+            metric_sums = [value or 0.0 for value in sums[index * 5:index * 5 + 5]]
+            totals[column] = [total + value for total, value in zip(totals[column], metric_sums)]
+            count, sum_y = metric_sums[0], metric_sums[3]
+            means[column] = sum_y / count if count else None
+        windows.append(
+            BodyTrendWindow(
+                window_start=since + timedelta(days=bucket * window_days),
+                count=n,
+                confidence=confidence,
+                **means,
+            )
+        )
+
+    slopes = {
+        column: _least_squares_slope(count, sx, sy, sxy, sxx)
+        for column, (count, sx, sxx, sy, sxy) in totals.items()
+    }
+    return BodyTrendResponse(
+        window_days=window_days,
+        since=since,
+        windows=windows,
+        slopes=BodyTrendSlopes(**slopes),
     )
@@ -11,28 +11,32 @@ from app.schemas.hydration import (
     HydrationLogResponse,
     HydrationSummaryResponse,
 )
-from app.services.hydration import HydrationService
+from app.services.hydration import HydrationService, get_hydration_service
 
 router = APIRouter(prefix="/hydration", tags=["hydration"])
-service = HydrationService()
 
 
 @router.post("/goal", response_model=HydrationGoalResponse)
 async def set_goal(
     payload: HydrationGoalRequest,
     user: User = Depends(get_current_user),
+    service: HydrationService = Depends(get_hydration_service),
 ) -> HydrationGoalResponse:
-    return service.set_goal(str(user.id), payload)
+    return await service.set_goal(str(user.id), payload)
 
 
 @router.post("/log", response_model=HydrationLogResponse)
 async def log(
     payload: HydrationLogRequest,
     user: User = Depends(get_current_user),
+    service: HydrationService = Depends(get_hydration_service),
 ) -> HydrationLogResponse:
-    return service.log(str(user.id), payload)
+    return await service.log(str(user.id), payload)
 
 
 @router.get("/summary", response_model=HydrationSummaryResponse)
-async def summary(user: User = Depends(get_current_user)) -> HydrationSummaryResponse:
-    return service.summary(str(user.id))
+async def summary(
+    user: User = Depends(get_current_user),
+    service: HydrationService = Depends(get_hydration_service),
+) -> HydrationSummaryResponse:
+    return await service.summary(str(user.id))
@@ -21,7 +21,7 @@ async def _user_identifier(user: User = Depends(get_current_user)) -> str:
     return str(user.id)
 
 
-ocr_rate_limit = rate_limiter(_user_identifier)
+ocr_rate_limit = rate_limiter(_user_identifier, scope="ocr")
 
 
 @router.post("/upload", response_model=LabReportResponse)
@@ -23,7 +23,7 @@ async def _user_identifier(user: User = Depends(get_current_user)) -> str:
     return str(user.id)
 
 
-photo_rate_limit = rate_limiter(_user_identifier)
+photo_rate_limit = rate_limiter(_user_identifier, scope="meal_photo")
 
 
 @router.post("/nutrition/generate", response_model=NutritionPlanResponse)
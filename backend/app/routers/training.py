@@ -25,7 +25,7 @@ async def _user_identifier(user: User = Depends(get_current_user)) -> str:
     return str(user.id)
 
 
-video_rate_limit = rate_limiter(_user_identifier)
+video_rate_limit = rate_limiter(_user_identifier, scope="video")
 
 
 @router.post("/generate", response_model=TrainingPlanResponse)
@@ -36,6 +36,39 @@ class BioimpedanceSummaryPoint(BaseModel):
     muscle_pct: float
 
 
+class BioimpedanceWindowStats(BaseModel):
+    days: int
+    count: int
+    mean_weight_kg: float | None = None
+    mean_fat_pct: float | None = None
+    mean_muscle_pct: float | None = None
+    fat_change_pct: float | None = Field(
+        default=None, description="Last minus first fat% inside the window"
+    )
+
+
 class BioimpedanceSummaryResponse(BaseModel):
     points: list[BioimpedanceSummaryPoint]
     trend: str
+    count: int = 0
+    mean_weight_kg: float | None = None
+    mean_fat_pct: float | None = None
+    mean_muscle_pct: float | None = None
+    fat_pct_slope_per_week: float | None = Field(
+        default=None, description="Least-squares slope of fat% over all records"
+    )
+    muscle_pct_slope_per_week: float | None = None
+    windows: list[BioimpedanceWindowStats] = Field(default_factory=list)
+
+
+class BioimpedanceImportError(BaseModel):
+    line: int = Field(description="1-based line number in the uploaded file")
+    errors: list[str]
+
+
+class BioimpedanceImportResponse(BaseModel):
+    imported: int
+    failed: int
+    errors: list[BioimpedanceImportError] = Field(
+        default_factory=list, description="Per-row problems, capped at the first 100"
+    )
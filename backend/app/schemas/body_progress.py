@@ -9,6 +9,12 @@ from pydantic import BaseModel, Field, HttpUrl
 BodyView = Literal["front", "side", "back"]
 
 
+class KeypointIn(BaseModel):
+    x: float = Field(allow_inf_nan=False)
+    y: float = Field(allow_inf_nan=False)
+    confidence: float = Field(default=0.0, ge=0, le=1)
+
+
 class BodyPhotoUploadRequest(BaseModel):
     view: BodyView
     file_name: str = Field(description="Original file name suggested by the client")
@@ -18,7 +24,7 @@ class BodyPhotoUploadRequest(BaseModel):
     clothing: str | None = None
     pose_hint: str | None = None
     timestamp: datetime
-    pose_keypoints: dict | None = Field(
+    pose_keypoints: dict[str, KeypointIn] | None = Field(
         default=None,
         description="Optional pose keypoints payload if already computed client-side",
     )
@@ -30,18 +36,47 @@ class BodyPhotoUploadResponse(BaseModel):
     fields: dict[str, str]
 
 
+class BodyPhotoBatchUploadRequest(BaseModel):
+    items: list[BodyPhotoUploadRequest] = Field(min_length=1, max_length=12)
+
+
+class BodyPhotoBatchUploadResponse(BaseModel):
+    items: list[BodyPhotoUploadResponse]
+
+
 class BodyPhotoItem(BaseModel):
     id: str
     view: BodyView
     file_url: HttpUrl
     taken_at: datetime
+    download_url: HttpUrl | None = Field(
+        default=None,
+        description="Short-lived presigned GET URL for the original image",
+    )
+    thumbnail_url: HttpUrl | None = None
+    compare_url: HttpUrl | None = None
 
     class Config:
         from_attributes = True
 
 
+class BodyPhotoDerivativesResponse(BaseModel):
+    photo_id: str
+    status: Literal["scheduled"] = "scheduled"
+
+
 class BodyPhotoListResponse(BaseModel):
     items: list[BodyPhotoItem]
+    next_cursor: str | None = Field(
+        default=None,
+        description="Opaque cursor for the next page; absent on the last page",
+    )
+
+
+class BodyBestMatchResponse(BaseModel):
+    photo_id: str
+    match: BodyPhotoItem
+    distance: float = Field(ge=0.0, description="Scaled capture/pose distance; lower is more comparable")
 
 
 class BodyComparisonRequest(BaseModel):
@@ -49,6 +84,10 @@ class BodyComparisonRequest(BaseModel):
     to_id: str
 
 
+class BodyComparisonBatchRequest(BaseModel):
+    pairs: list[BodyComparisonRequest] = Field(min_length=1, max_length=500)
+
+
 class BodyMetrics(BaseModel):
     delta_waist_pct: float
     delta_hip_pct: float
@@ -65,6 +104,51 @@ class BodyComparisonResponse(BaseModel):
     verdict: str
 
 
+class BodyComparisonBatchResponse(BaseModel):
+    items: list[BodyComparisonResponse] = Field(description="One result per requested pair, in order")
+
+
+class BodyTimelineEntry(BaseModel):
+    view: BodyView
+    from_id: str
+    to_id: str
+    comparison_id: str
+    metrics: BodyMetrics
+    confidence: float = Field(ge=0.0, le=1.0)
+    verdict: str
+
+
+class BodyTimelineResponse(BaseModel):
+    items: list[BodyTimelineEntry]
+
+
+class BodyTrendWindow(BaseModel):
+    window_start: datetime
+    count: int
+    # Means over the comparisons that have the metric; None when none of them do.
+    delta_waist_pct: float | None = None
+    delta_hip_pct: float | None = None
+    delta_shoulders_pct: float | None = None
+    delta_arm_pct: float | None = None
+    confidence: float
+
+
+class BodyTrendSlopes(BaseModel):
+    """Least-squares slope of each metric against photo date, in percentage points per day."""
+
+    delta_waist_pct: float | None = None
+    delta_hip_pct: float | None = None
+    delta_shoulders_pct: float | None = None
+    delta_arm_pct: float | None = None
+
+
+class BodyTrendResponse(BaseModel):
+    window_days: int
+    since: datetime
+    windows: list[BodyTrendWindow]
+    slopes: BodyTrendSlopes
+
+
 class BodyComparisonListItem(BaseModel):
     id: str
     from_photo_url: HttpUrl
@@ -75,6 +159,11 @@ class BodyComparisonListItem(BaseModel):
         from_attributes = True
 
 
+class BodyComparisonListResponse(BaseModel):
+    items: list[BodyComparisonListItem]
+    next_cursor: str | None = None
+
+
 class BodyComparisonPairResponse(BaseModel):
     from_photo: BodyPhotoItem
     to_photo: BodyPhotoItem
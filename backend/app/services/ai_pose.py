@@ -1,17 +1,274 @@
 from __future__ import annotations
 
-from typing import Mapping
+import asyncio
+import hashlib
+import importlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Mapping, Protocol, Sequence
 
+import numpy as np
+from fastapi import Depends
+
+from app.core.config import get_settings
 from app.models.body import BodyPhoto
+from app.models.keypoints import KEYPOINT_NAMES, pack_keypoints
+from app.services.photo_index import get_photo_index
+from app.services.storage import StorageService, get_storage_service, is_missing_object
+
+
+class PoseEstimationError(RuntimeError):
+    pass
+
+
+class PoseImageMissingError(PoseEstimationError):
+    """The original is not in storage yet (e.g. its presigned upload is still running)."""
+
+
+class PoseModel(Protocol):
+    def predict(self, images: Sequence[bytes]) -> list[dict[str, dict[str, float]]]:
+        ...
+
+
+# Normalized (x, y) of each keypoint for an upright, front-facing subject.
+_STAND_IN_TEMPLATE = {
+    "nose": (0.50, 0.12),
+    "neck": (0.50, 0.20),
+    "right_shoulder": (0.32, 0.24),
+    "right_elbow": (0.26, 0.40),
+    "right_wrist": (0.24, 0.54),
+    "left_shoulder": (0.68, 0.24),
+    "left_elbow": (0.74, 0.40),
+    "left_wrist": (0.76, 0.54),
+    "mid_hip": (0.50, 0.58),
+    "right_hip": (0.38, 0.58),
+    "right_knee": (0.39, 0.76),
+    "right_ankle": (0.40, 0.94),
+    "left_hip": (0.62, 0.58),
+    "left_knee": (0.61, 0.76),
+    "left_ankle": (0.60, 0.94),
+}
+
+
+class StandInPoseModel:
+    """Deterministic CPU model for tests and local runs: jitters a template by the image digest."""
+
+    def predict(self, images: Sequence[bytes]) -> list[dict[str, dict[str, float]]]:
+        return [self._predict_one(image) for image in images]
+
+    def _predict_one(self, image: bytes) -> dict[str, dict[str, float]]:
+        seed = int.from_bytes(hashlib.sha256(image).digest()[:8], "little")
+        rng = np.random.default_rng(seed)
+        jitter = rng.normal(scale=0.01, size=(len(KEYPOINT_NAMES), 2))
+        confidence = rng.uniform(0.75, 0.99, size=len(KEYPOINT_NAMES))
+        return {
+            name: {
+                "x": float(_STAND_IN_TEMPLATE[name][0] + dx),
+                "y": float(_STAND_IN_TEMPLATE[name][1] + dy),
+                "confidence": float(score),
+            }
+            for name, (dx, dy), score in zip(KEYPOINT_NAMES, jitter, confidence)
+        }
+
+
+_worker_model: PoseModel | None = None
+
+
+def _load_model(model_path: str) -> PoseModel:
+    module_name, _, attribute = model_path.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)()
+
+
+def _init_worker(model_path: str) -> None:
+    global _worker_model
+    _worker_model = _load_model(model_path)
+
+
+def _predict_batch(images: list[bytes]) -> list[bytes]:
+    if _worker_model is None:
+        raise PoseEstimationError("Pose worker was not initialized")
+    return [pack_keypoints(keypoints) for keypoints in _worker_model.predict(images)]
+
+
+class PoseWorkerPool:
+    """Micro-batches estimation requests and runs them on a process pool.
+
+    Requests are flushed once ``max_batch_size`` images are queued or ``max_wait_ms``
+    elapsed since the first one, so each worker pays model overhead per batch.
+    """
+
+    def __init__(
+        self,
+        *,
+        model_path: str,
+        max_workers: int,
+        max_batch_size: int,
+        max_wait_ms: int,
+    ) -> None:
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_worker, initargs=(model_path,)
+        )
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue[tuple[bytes, asyncio.Future[bytes]]] | None = None
+        self._batcher: asyncio.Task | None = None
+        # Strong references to in-flight batches; the event loop only keeps weak ones.
+        self._dispatches: set[asyncio.Task] = set()
+
+    async def estimate(self, image: bytes) -> bytes:
+        """Return packed keypoints (see ``app.models.keypoints``) for ``image``."""
+
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._batcher is None or self._batcher.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._batcher = loop.create_task(self._collect_batches())
+        future: asyncio.Future[bytes] = loop.create_future()
+        await self._queue.put((image, future))
+        return await future
+
+    async def _collect_batches(self) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            task = loop.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: list[tuple[bytes, asyncio.Future[bytes]]]) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                self._executor, _predict_batch, [image for image, _ in batch]
+            )
+        except asyncio.CancelledError:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(PoseEstimationError("Pose worker pool closed"))
+            raise
+        except Exception as exc:  # noqa: BLE001 - propagated to every waiter
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(PoseEstimationError(str(exc)))
+            return
+        for (_, future), packed in zip(batch, results):
+            if not future.done():
+                future.set_result(packed)
+
+    def close(self) -> None:
+        if self._batcher is not None:
+            self._batcher.cancel()
+        for task in list(self._dispatches):
+            task.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: PoseWorkerPool | None = None
+
+
+def get_pose_pool() -> PoseWorkerPool | None:
+    """Shared worker pool, or None when no ``pose_model`` is configured."""
+
+    global _pool
+    settings = get_settings()
+    if _pool is None and settings.pose_model is not None:
+        _pool = PoseWorkerPool(
+            model_path=settings.pose_model,
+            max_workers=settings.pose_workers,
+            max_batch_size=settings.pose_batch_size,
+            max_wait_ms=settings.pose_batch_wait_ms,
+        )
+    return _pool
+
+
+def shutdown_pose_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
 
 
 class PoseEstimator:
+    def __init__(
+        self,
+        pool: PoseWorkerPool | None = Depends(get_pose_pool),
+        storage: StorageService = Depends(get_storage_service),
+    ) -> None:
+        self._pool = pool
+        self._storage = storage
+
+    async def ensure_keypoints(self, photos: Sequence[BodyPhoto]) -> None:
+        """Estimate keypoints for photos lacking them and write them back onto the rows.
+
+        Estimations run concurrently so the pool batches them together. Photos that fail
+        get ``pose_retry_after`` set and are skipped until it passes, except when their
+        original is simply not uploaded yet; callers are responsible for committing the
+        session, including after an error.
+        """
+
+        now = datetime.now(timezone.utc)
+        missing = [photo for photo in photos if photo.pose_keypoints_packed is None]
+        pending = [photo for photo in missing if _retry_due(photo, now)]
+        if pending and self._pool is None:
+            raise PoseEstimationError("No pose model is configured")
+        results = await asyncio.gather(
+            *(self._estimate(photo) for photo in pending), return_exceptions=True
+        )
+        retry_after = now + timedelta(seconds=get_settings().pose_retry_seconds)
+        failed = len(missing) - len(pending)
+        not_uploaded = 0
+        for photo, result in zip(pending, results):
+            if isinstance(result, PoseImageMissingError):
+                # Retried on the next call; only real failures back off.
+                not_uploaded += 1
+            elif isinstance(result, Exception):
+                photo.pose_retry_after = retry_after
+                failed += 1
+            else:
+                photo.pose_keypoints_packed = result
+                get_photo_index().observe(photo)
+        if failed:
+            raise PoseEstimationError(f"Pose estimation failed for {failed + not_uploaded} photo(s)")
+        if not_uploaded:
+            raise PoseImageMissingError(f"{not_uploaded} photo(s) not uploaded yet")
+
     async def extract_keypoints(self, photo: BodyPhoto) -> Mapping[str, dict[str, float]]:
-        if photo.pose_keypoints is None:
-            raise RuntimeError("Pose keypoints missing for photo analysis")
+        await self.ensure_keypoints([photo])
         return photo.pose_keypoints
 
+    async def _estimate(self, photo: BodyPhoto) -> bytes:
+        try:
+            key = self._storage.object_key_from_url(photo.file_url)
+            image = await asyncio.to_thread(self._storage.download_object, key)
+        except Exception as exc:  # noqa: BLE001 - storage errors surface as estimation errors
+            if is_missing_object(exc):
+                raise PoseImageMissingError(
+                    f"Image for photo {photo.id} is not uploaded yet"
+                ) from exc
+            raise PoseEstimationError(f"Could not load image for photo {photo.id}") from exc
+        return await self._pool.estimate(image)
+
+
+def _retry_due(photo: BodyPhoto, now: datetime) -> bool:
+    retry_after = photo.pose_retry_after
+    if retry_after is None:
+        return True
+    if retry_after.tzinfo is None:
+        retry_after = retry_after.replace(tzinfo=timezone.utc)
+    return retry_after <= now
+
 
 async def get_keypoints(photo: BodyPhoto, estimator: PoseEstimator | None = None):
-    estimator = estimator or PoseEstimator()
+    estimator = estimator or PoseEstimator(get_pose_pool(), get_storage_service())
     return await estimator.extract_keypoints(photo)
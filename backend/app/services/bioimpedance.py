@@ -1,63 +1,478 @@
 from __future__ import annotations
 
-from collections import defaultdict
-from uuid import uuid4
+import bisect
+import codecs
+import csv
+import time
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Iterator
+from datetime import date, timedelta
 
+import numpy as np
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models import BioimpedanceRecord
 from app.schemas.bioimpedance import (
     BioimpedanceCreateRequest,
+    BioimpedanceImportError,
+    BioimpedanceImportResponse,
     BioimpedanceResponse,
     BioimpedanceSummaryPoint,
     BioimpedanceSummaryResponse,
     BioimpedanceUpdateRequest,
+    BioimpedanceWindowStats,
 )
+from app.services.downsample import lttb_indices
 
+SUMMARY_WINDOWS_DAYS = (30, 90)
+IMPORT_BATCH_SIZE = 500
+IMPORT_MAX_REPORTED_ERRORS = 100
+IMPORT_REQUIRED_COLUMNS = frozenset({"measured_at", "weight_kg", "fat_pct", "muscle_pct"})
+# Header spellings seen in scale-vendor exports, normalized to BioimpedanceCreateRequest fields.
+IMPORT_COLUMN_ALIASES = {
+    "measured_at": "measured_at",
+    "date": "measured_at",
+    "measurement_date": "measured_at",
+    "weight_kg": "weight_kg",
+    "weight": "weight_kg",
+    "fat_pct": "fat_pct",
+    "body_fat": "fat_pct",
+    "body_fat_pct": "fat_pct",
+    "fat": "fat_pct",
+    "muscle_pct": "muscle_pct",
+    "muscle": "muscle_pct",
+    "muscle_mass_pct": "muscle_pct",
+    "visceral_fat": "visceral_fat",
+}
+# Day numbers are counted from here so the regression sums stay small.
+_DAY_ZERO = date(2000, 1, 1)
+
+
+def _to_response(record: BioimpedanceRecord) -> BioimpedanceResponse:
+    return BioimpedanceResponse(
+        id=record.id,
+        measured_at=record.measured_at,
+        weight_kg=record.weight_kg,
+        fat_pct=record.fat_pct,
+        muscle_pct=record.muscle_pct,
+        visceral_fat=record.visceral_fat,
+    )
+
+
+def _point(record: BioimpedanceResponse) -> BioimpedanceSummaryPoint:
+    return BioimpedanceSummaryPoint(
+        measured_at=record.measured_at,
+        weight_kg=record.weight_kg,
+        fat_pct=record.fat_pct,
+        muscle_pct=record.muscle_pct,
+    )
+
+
+def _slope(n: float, sx: float, sxx: float, sy: float, sxy: float) -> float | None:
+    denominator = n * sxx - sx * sx
+    if n < 2 or abs(denominator) < 1e-9:
+        return None
+    return (n * sxy - sx * sy) / denominator
+
+
+class _RunningStats:
+    """Sums needed for means and least-squares slopes, updated in O(1) per record."""
+
+    __slots__ = ("n", "sx", "sxx", "weight", "fat", "muscle", "x_fat", "x_muscle")
 
-class BioimpedanceService:
     def __init__(self) -> None:
-        self._records: dict[str, dict[str, BioimpedanceResponse]] = defaultdict(dict)
-
-    def create(self, user_id: str, payload: BioimpedanceCreateRequest) -> BioimpedanceResponse:
-        record = BioimpedanceResponse(
-            id=str(uuid4()),
-            measured_at=payload.measured_at,
-            weight_kg=payload.weight_kg,
-            fat_pct=payload.fat_pct,
-            muscle_pct=payload.muscle_pct,
-            visceral_fat=payload.visceral_fat,
+        self.n = self.sx = self.sxx = 0.0
+        self.weight = self.fat = self.muscle = self.x_fat = self.x_muscle = 0.0
+
+    def add(self, record: BioimpedanceResponse, sign: int = 1) -> None:
+        x = float((record.measured_at - _DAY_ZERO).days)
+        self.n += sign
+        self.sx += sign * x
+        self.sxx += sign * x * x
+        self.weight += sign * record.weight_kg
+        self.fat += sign * record.fat_pct
+        self.muscle += sign * record.muscle_pct
+        self.x_fat += sign * x * record.fat_pct
+        self.x_muscle += sign * x * record.muscle_pct
+
+    def mean(self, total: float) -> float | None:
+        return total / self.n if self.n else None
+
+    def fat_slope(self) -> float | None:
+        return _slope(self.n, self.sx, self.sxx, self.fat, self.x_fat)
+
+    def muscle_slope(self) -> float | None:
+        return _slope(self.n, self.sx, self.sxx, self.muscle, self.x_muscle)
+
+
+class _UserSeries:
+    """One user's records kept sorted by ``(measured_at, id)``, with running aggregates."""
+
+    __slots__ = ("keys", "records", "points", "by_id", "stats", "loaded_at", "downsampled")
+
+    def __init__(self, records: list[BioimpedanceResponse]) -> None:
+        self.records = records
+        self.keys = [(record.measured_at, record.id) for record in records]
+        self.points = [_point(record) for record in records]
+        self.by_id = {record.id: record for record in records}
+        self.stats = _RunningStats()
+        for record in records:
+            self.stats.add(record)
+        self.loaded_at = time.monotonic()
+        # Downsampled point lists by max_points; dropped whenever the series changes.
+        self.downsampled: dict[int, list[BioimpedanceSummaryPoint]] = {}
+
+    def insert(self, record: BioimpedanceResponse) -> None:
+        key = (record.measured_at, record.id)
+        position = bisect.bisect_left(self.keys, key)
+        self.keys.insert(position, key)
+        self.records.insert(position, record)
+        self.points.insert(position, _point(record))
+        self.by_id[record.id] = record
+        self.stats.add(record)
+        self.downsampled.clear()
+
+    def replace(self, record: BioimpedanceResponse) -> None:
+        position = bisect.bisect_left(self.keys, (record.measured_at, record.id))
+        self.stats.add(self.records[position], sign=-1)
+        self.stats.add(record)
+        self.records[position] = record
+        self.points[position] = _point(record)
+        self.by_id[record.id] = record
+        self.downsampled.clear()
+
+    def remove(self, record_id: str) -> None:
+        record = self.by_id.pop(record_id, None)
+        if record is None:
+            return
+        position = bisect.bisect_left(self.keys, (record.measured_at, record_id))
+        del self.keys[position]
+        del self.records[position]
+        del self.points[position]
+        self.stats.add(record, sign=-1)
+        self.downsampled.clear()
+
+    def chart_points(self, max_points: int | None) -> list[BioimpedanceSummaryPoint]:
+        """Summary points, LTTB-downsampled to ``max_points`` when the series is longer."""
+
+        if max_points is None or len(self.points) <= max_points:
+            return list(self.points)
+        cached = self.downsampled.get(max_points)
+        if cached is None:
+            x = np.fromiter(
+                ((record.measured_at - _DAY_ZERO).days for record in self.records),
+                dtype=np.float64,
+                count=len(self.records),
+            )
+            y = np.array(
+                [(r.weight_kg, r.fat_pct, r.muscle_pct) for r in self.records], dtype=np.float64
+            )
+            cached = [self.points[index] for index in lttb_indices(x, y, max_points)]
+            self.downsampled[max_points] = cached
+        return cached
+
+    def window(self, days: int, today: date) -> BioimpedanceWindowStats:
+        """Stats over the trailing ``days`` ending ``today``; touches only that window."""
+
+        records = self.between(today - timedelta(days=days - 1), today)
+        count = len(records)
+        return BioimpedanceWindowStats(
+            days=days,
+            count=count,
+            mean_weight_kg=sum(r.weight_kg for r in records) / count if count else None,
+            mean_fat_pct=sum(r.fat_pct for r in records) / count if count else None,
+            mean_muscle_pct=sum(r.muscle_pct for r in records) / count if count else None,
+            fat_change_pct=records[-1].fat_pct - records[0].fat_pct if count >= 2 else None,
+        )
+
+    def between(self, start: date | None, end: date | None) -> list[BioimpedanceResponse]:
+        low = 0 if start is None else bisect.bisect_left(self.keys, (start,))
+        high = (
+            len(self.keys)
+            if end is None
+            else bisect.bisect_left(self.keys, (end + timedelta(days=1),))
         )
-        self._records[user_id][record.id] = record
+        return self.records[low:high]
+
+
+class BioimpedanceService:
+    """SQL-backed bioimpedance store with a per-process sorted cache of each user's series.
+
+    Listings and lookups read the database directly, so they see writes from every
+    worker. Summaries use the cache: writes go to the database first and are then folded
+    into a loaded series by bisect insertion, and the TTL bounds how long writes from
+    other workers can go unseen there.
+    """
+
+    def __init__(self, max_users: int | None = None, ttl_seconds: float | None = None) -> None:
+        settings = get_settings()
+        self.max_users = max_users or settings.bioimpedance_cache_users
+        self.ttl_seconds = ttl_seconds or settings.bioimpedance_cache_ttl_seconds
+        self._series: OrderedDict[str, _UserSeries] = OrderedDict()
+
+    async def _load(self, session: AsyncSession, user_id: str) -> _UserSeries:
+        series = self._series.get(user_id)
+        if series is not None and time.monotonic() - series.loaded_at < self.ttl_seconds:
+            self._series.move_to_end(user_id)
+            return series
+
+        rows = (await session.scalars(
+            select(BioimpedanceRecord)
+            .where(BioimpedanceRecord.user_id == user_id)
+            .order_by(BioimpedanceRecord.measured_at, BioimpedanceRecord.id)
+        )).all()
+        series = _UserSeries([_to_response(row) for row in rows])
+        self._series[user_id] = series
+        self._series.move_to_end(user_id)
+        while len(self._series) > self.max_users:
+            self._series.popitem(last=False)
+        return series
+
+    def _cached(self, user_id: str) -> _UserSeries | None:
+        return self._series.get(user_id)
+
+    async def create(
+        self, session: AsyncSession, user_id: str, payload: BioimpedanceCreateRequest
+    ) -> BioimpedanceResponse:
+        row = BioimpedanceRecord(user_id=user_id, **payload.model_dump())
+        session.add(row)
+        await session.commit()
+        record = _to_response(row)
+        series = self._cached(user_id)
+        if series is not None:
+            series.insert(record)
         return record
 
-    def list(self, user_id: str) -> list[BioimpedanceResponse]:
-        return sorted(self._records[user_id].values(), key=lambda r: r.measured_at)
+    async def list(
+        self,
+        session: AsyncSession,
+        user_id: str,
+        start: date | None = None,
+        end: date | None = None,
+        limit: int | None = None,
+    ) -> list[BioimpedanceResponse]:
+        # Served by the (user_id, measured_at) index.
+        query = (
+            select(BioimpedanceRecord)
+            .where(BioimpedanceRecord.user_id == user_id)
+            .order_by(BioimpedanceRecord.measured_at, BioimpedanceRecord.id)
+            .limit(limit)
+        )
+        if start is not None:
+            query = query.where(BioimpedanceRecord.measured_at >= start)
+        if end is not None:
+            query = query.where(BioimpedanceRecord.measured_at <= end)
+        return [_to_response(row) for row in await session.scalars(query)]
 
-    def get(self, user_id: str, record_id: str) -> BioimpedanceResponse | None:
-        return self._records[user_id].get(record_id)
+    async def get(
+        self, session: AsyncSession, user_id: str, record_id: str
+    ) -> BioimpedanceResponse | None:
+        row = await session.scalar(
+            select(BioimpedanceRecord).where(
+                BioimpedanceRecord.user_id == user_id, BioimpedanceRecord.id == record_id
+            )
+        )
+        return None if row is None else _to_response(row)
 
-    def update(self, user_id: str, record_id: str, payload: BioimpedanceUpdateRequest) -> BioimpedanceResponse | None:
-        record = self._records[user_id].get(record_id)
-        if not record:
+    async def update(
+        self,
+        session: AsyncSession,
+        user_id: str,
+        record_id: str,
+        payload: BioimpedanceUpdateRequest,
+    ) -> BioimpedanceResponse | None:
+        row = await session.scalar(
+            select(BioimpedanceRecord).where(
+                BioimpedanceRecord.user_id == user_id, BioimpedanceRecord.id == record_id
+            )
+        )
+        if row is None:
             return None
-        updated = record.model_copy(update=payload.model_dump(exclude_none=True))
-        self._records[user_id][record_id] = updated
-        return updated
-
-    def delete(self, user_id: str, record_id: str) -> bool:
-        return self._records[user_id].pop(record_id, None) is not None
-
-    def summary(self, user_id: str) -> BioimpedanceSummaryResponse:
-        records = self.list(user_id)
-        points = [
-            BioimpedanceSummaryPoint(
-                measured_at=record.measured_at,
-                weight_kg=record.weight_kg,
-                fat_pct=record.fat_pct,
-                muscle_pct=record.muscle_pct,
+        for field, value in payload.model_dump(exclude_none=True).items():
+            setattr(row, field, value)
+        await session.commit()
+        record = _to_response(row)
+        series = self._cached(user_id)
+        if series is not None and record_id in series.by_id:
+            series.replace(record)
+        return record
+
+    async def delete(self, session: AsyncSession, user_id: str, record_id: str) -> bool:
+        result = await session.execute(
+            delete(BioimpedanceRecord).where(
+                BioimpedanceRecord.user_id == user_id, BioimpedanceRecord.id == record_id
             )
-            for record in records
-        ]
-        if len(points) >= 2:
-            trend = "queda" if points[-1].fat_pct < points[0].fat_pct else "estável"
-        else:
-            trend = "estável"
-        return BioimpedanceSummaryResponse(points=points, trend=trend)
+        )
+        await session.commit()
+        series = self._cached(user_id)
+        if series is not None:
+            series.remove(record_id)
+        return result.rowcount > 0
+
+    async def summary(
+        self,
+        session: AsyncSession,
+        user_id: str,
+        include_points: bool = True,
+        max_points: int | None = None,
+        today: date | None = None,
+    ) -> BioimpedanceSummaryResponse:
+        series = await self._load(session, user_id)
+        stats = series.stats
+        today = today or date.today()
+        fat_slope = stats.fat_slope()
+        muscle_slope = stats.muscle_slope()
+        return BioimpedanceSummaryResponse(
+            points=series.chart_points(max_points) if include_points else [],
+            trend="queda" if fat_slope is not None and fat_slope < 0 else "estável",
+            count=int(stats.n),
+            mean_weight_kg=stats.mean(stats.weight),
+            mean_fat_pct=stats.mean(stats.fat),
+            mean_muscle_pct=stats.mean(stats.muscle),
+            fat_pct_slope_per_week=None if fat_slope is None else fat_slope * 7,
+            muscle_pct_slope_per_week=None if muscle_slope is None else muscle_slope * 7,
+            windows=[series.window(days, today) for days in SUMMARY_WINDOWS_DAYS],
+        )
+
+    async def import_csv(
+        self, session: AsyncSession, user_id: str, chunks: AsyncIterator[bytes]
+    ) -> BioimpedanceImportResponse:
+        """Import a CSV export streamed as byte chunks, inserting valid rows in batches.
+
+        Invalid rows are skipped and reported by line number; valid rows are committed
+        together at the end. Raises ``ValueError`` when the header is absent or lacks a
+        required column.
+        """
+
+        imported = failed = 0
+        errors: list[BioimpedanceImportError] = []
+        batch: list[dict] = []
+
+        async def _flush() -> None:
+            nonlocal imported
+            if batch:
+                await session.execute(insert(BioimpedanceRecord), batch)
+                imported += len(batch)
+                batch.clear()
+
+        columns: list[str | None] | None = None
+        async for line_number, row in _csv_rows(chunks):
+            if columns is None:
+                columns = [
+                    IMPORT_COLUMN_ALIASES.get(name.strip().lower().replace(" ", "_"))
+                    for name in row
+                ]
+                missing = IMPORT_REQUIRED_COLUMNS - set(columns)
+                if missing:
+                    raise ValueError(f"Missing required columns: {', '.join(sorted(missing))}")
+                continue
+            if not any(cell.strip() for cell in row):
+                continue
+
+            values = {
+                column: _clean_cell(column, cell)
+                for column, cell in zip(columns, row)
+                if column is not None and cell.strip()
+            }
+            try:
+                record = BioimpedanceCreateRequest.model_validate(values)
+            except ValidationError as exc:
+                failed += 1
+                if len(errors) < IMPORT_MAX_REPORTED_ERRORS:
+                    errors.append(
+                        BioimpedanceImportError(
+                            line=line_number,
+                            errors=[
+                                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+                                for error in exc.errors()
+                            ],
+                        )
+                    )
+                continue
+            batch.append({"user_id": user_id, **record.model_dump()})
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await _flush()
+
+        if columns is None:
+            raise ValueError("The file has no header row")
+        await _flush()
+        if imported:
+            await session.commit()
+            self._series.pop(user_id, None)
+        return BioimpedanceImportResponse(imported=imported, failed=failed, errors=errors)
+
+    def clear(self) -> None:
+        self._series.clear()
+
+
+def _clean_cell(column: str, cell: str) -> str:
+    cell = cell.strip()
+    if column == "measured_at" and len(cell) > 10 and cell[10] in "T ":
+        # Scales export timestamps; only the calendar day is stored.
+        return cell[:10]
+    if column != "measured_at":
+        # Tolerate decimal commas from localized exports ("18,4").
+        return cell.replace(",", ".")
+    return cell
+
+
+class _LineFeed:
+    """Iterator handing buffered lines to ``csv.reader``; resumable after running dry."""
+
+    def __init__(self) -> None:
+        self.lines: deque[str] = deque()
+
+    def __iter__(self) -> "_LineFeed":
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def _csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, list[str]]]:
+    """Yield ``(first_line_number, cells)`` per record as lines arrive; never buffers the whole body.
+
+    One ``csv.reader`` reads every line. Lines are only handed over once their quotes
+    balance, so the reader never runs dry inside a quoted cell that spans lines.
+    """
+
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    feed = _LineFeed()
+    reader = None
+    pending = ""
+    record: list[str] = []
+    quotes = 0
+    line_number = 0
+
+    def _release(lines: list[str]) -> Iterator[tuple[int, list[str]]]:
+        nonlocal reader, line_number
+        if reader is None:
+            # Exports from locales with decimal commas separate fields with semicolons.
+            delimiter = ";" if lines[0].count(";") > lines[0].count(",") else ","
+            reader = csv.reader(feed, delimiter=delimiter)
+        feed.lines.extend(lines)
+        for cells in reader:
+            yield line_number + 1, cells
+            line_number = reader.line_num
+
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            record.append(line + "\n")
+            quotes += line.count('"')
+            if quotes % 2 == 0:
+                for item in _release(record):
+                    yield item
+                record, quotes = [], 0
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        record.append(pending)
+    if record:
+        for item in _release(record):
+            yield item
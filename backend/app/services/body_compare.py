@@ -1,14 +1,25 @@
 from __future__ import annotations
 
+import hashlib
 from dataclasses import dataclass
 from math import sqrt
-from typing import Mapping
+from typing import Mapping, Sequence
 
-from app.models.body import BodyPhoto
+import numpy as np
+
+from app.models.body import BodyPhoto, fingerprint_keypoints
+from app.models.keypoints import KEYPOINT_INDEX, KEYPOINT_NAMES, pose_geometry
 
 
 BodyKeypoints = Mapping[str, dict[str, float]]
 
+SEGMENTS: dict[str, tuple[str, str]] = {
+    "shoulders": ("left_shoulder", "right_shoulder"),
+    "waist": ("left_hip", "right_hip"),
+    "hip": ("left_hip", "right_hip"),
+    "arm": ("left_elbow", "right_elbow"),
+}
+
 
 @dataclass
 class BodyMetricResult:
@@ -22,6 +33,14 @@ class BodyMetricResult:
     verdict: str
 
 
+def comparison_fingerprint(from_photo: BodyPhoto, to_photo: BodyPhoto) -> str:
+    """Hash both photos' keypoints; a stored comparison is only reusable while this matches."""
+
+    from_hash = from_photo.keypoints_hash or fingerprint_keypoints(from_photo.pose_keypoints_packed) or ""
+    to_hash = to_photo.keypoints_hash or fingerprint_keypoints(to_photo.pose_keypoints_packed) or ""
+    return hashlib.sha256(f"{from_hash}:{to_hash}".encode()).hexdigest()
+
+
 def _distance(a: dict[str, float], b: dict[str, float]) -> float:
     return sqrt((a["x"] - b["x"]) ** 2 + (a["y"] - b["y"]) ** 2)
 
@@ -66,15 +85,8 @@ def calculate_relative_metrics(
     torso_to = _torso_length(to_keypoints)
 
     metrics = {}
-    segments = {
-        "shoulders": ("left_shoulder", "right_shoulder"),
-        "waist": ("left_hip", "right_hip"),
-        "hip": ("left_hip", "right_hip"),
-        "arm": ("left_elbow", "right_elbow"),
-    }
-
     confidence_segments: dict[str, float] = {}
-    for name, (left, right) in segments.items():
+    for name, (left, right) in SEGMENTS.items():
         width_from = _segment_width(from_keypoints, left, right)
         width_to = _segment_width(to_keypoints, left, right)
         norm_from = _normalize(width_from, torso_from)
@@ -122,10 +134,15 @@ def _derive_posture_hint(
 ) -> str | None:
     if "left_shoulder" in from_keypoints and "left_shoulder" in to_keypoints:
         shoulder_delta = to_keypoints["left_shoulder"]["y"] - from_keypoints["left_shoulder"]["y"]
-        if shoulder_delta < -0.01:
-            return "ombros mais alinhados"
-        if shoulder_delta > 0.01:
-            return "ombros ligeiramente elevados"
+        return _posture_hint_from_delta(shoulder_delta)
+    return None
+
+
+def _posture_hint_from_delta(shoulder_delta: float) -> str | None:
+    if shoulder_delta < -0.01:
+        return "ombros mais alinhados"
+    if shoulder_delta > 0.01:
+        return "ombros ligeiramente elevados"
     return None
 
 
@@ -143,6 +160,139 @@ def _build_verdict(metrics: Mapping[str, float], confidence: float) -> str:
     return "Mudança mínima/indetectável devido a variações pequenas ou baixa confiança."
 
 
+_SEGMENT_NAMES = tuple(SEGMENTS)
+
+
+@dataclass
+class BatchFeatures:
+    """Per-photo geometry for the batch engine, one row per stacked photo."""
+
+    normalized_widths: np.ndarray
+    segment_confidence: np.ndarray
+    shoulder_y: np.ndarray
+
+
+@dataclass
+class BatchComparison:
+    """Vectorized comparison output; leading axes follow the index arrays used."""
+
+    deltas_pct: np.ndarray
+    confidence: np.ndarray
+    shoulder_delta: np.ndarray
+
+
+def stack_keypoints(keypoints: Sequence[BodyKeypoints | np.ndarray]) -> np.ndarray:
+    """Stack keypoints into an ``(N, len(KEYPOINT_NAMES), 3)`` x/y/confidence array.
+
+    Entries may be keypoint dicts or packed arrays from ``BodyPhoto.keypoints_array``.
+    Missing keypoints are left as NaN so the batch engine can mask them out.
+    """
+
+    stacked = np.full((len(keypoints), len(KEYPOINT_NAMES), 3), np.nan)
+    for row, points in enumerate(keypoints):
+        if isinstance(points, np.ndarray):
+            stacked[row] = points
+            continue
+        for name, column in KEYPOINT_INDEX.items():
+            point = points.get(name)
+            if point is not None:
+                stacked[row, column] = (point["x"], point["y"], point.get("confidence", 0.0))
+    return stacked
+
+
+def compute_batch_features(stacked: np.ndarray) -> BatchFeatures:
+    geometry = pose_geometry(stacked, SEGMENTS)
+    return BatchFeatures(
+        normalized_widths=geometry.normalized_widths,
+        segment_confidence=geometry.segment_confidence,
+        shoulder_y=geometry.shoulder_y,
+    )
+
+
+def features_from_photos(photos: Sequence[BodyPhoto]) -> BatchFeatures:
+    """Build batch features from the columns precomputed on each photo, without keypoint math."""
+
+    # Column order follows SEGMENTS: shoulders, waist, hip, arm (waist and hip share endpoints).
+    table = np.array(
+        [
+            (
+                photo.shoulders_ratio,
+                photo.hip_ratio,
+                photo.hip_ratio,
+                photo.arm_ratio,
+                photo.shoulders_confidence,
+                photo.hip_confidence,
+                photo.hip_confidence,
+                photo.arm_confidence,
+                photo.shoulder_y,
+            )
+            for photo in photos
+        ],
+        dtype=np.float64,
+    ).reshape(len(photos), 9)
+    return BatchFeatures(
+        normalized_widths=table[:, 0:4],
+        segment_confidence=np.nan_to_num(table[:, 4:8], nan=0.0),
+        shoulder_y=table[:, 8],
+    )
+
+
+def compare_batch(
+    features: BatchFeatures, from_index: np.ndarray, to_index: np.ndarray
+) -> BatchComparison:
+    """Compare ``from_index[i]`` against ``to_index[i]`` for every i in one pass.
+
+    Index arrays broadcast against each other, so column/row vectors yield a matrix.
+    """
+
+    norm_from = features.normalized_widths[from_index]
+    norm_to = features.normalized_widths[to_index]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        deltas = (norm_to - norm_from) / norm_from * 100
+    deltas = np.where(np.isfinite(deltas), deltas, 0.0)
+
+    segment_confidence = np.minimum(
+        features.segment_confidence[from_index], features.segment_confidence[to_index]
+    )
+    return BatchComparison(
+        deltas_pct=deltas,
+        confidence=segment_confidence.min(axis=-1),
+        shoulder_delta=features.shoulder_y[to_index] - features.shoulder_y[from_index],
+    )
+
+
+def compare_matrix(features: BatchFeatures) -> BatchComparison:
+    """Compare every stacked photo against every other; entry ``[i, j]`` is i -> j."""
+
+    index = np.arange(features.normalized_widths.shape[0], dtype=np.intp)
+    return compare_batch(features, index[:, None], index[None, :])
+
+
+def build_metric_results(comparison: BatchComparison) -> list[BodyMetricResult]:
+    results: list[BodyMetricResult] = []
+    for deltas, confidence, shoulder_delta in zip(
+        comparison.deltas_pct.tolist(),
+        comparison.confidence.tolist(),
+        comparison.shoulder_delta.tolist(),
+    ):
+        metrics = dict(zip(_SEGMENT_NAMES, deltas))
+        results.append(
+            BodyMetricResult(
+                delta_waist_pct=metrics["waist"],
+                delta_hip_pct=metrics["hip"],
+                delta_shoulders_pct=metrics["shoulders"],
+                delta_arm_pct=metrics["arm"],
+                confidence=confidence,
+                fat_change_hint=_derive_fat_hint(metrics),
+                posture_change_hint=(
+                    None if np.isnan(shoulder_delta) else _posture_hint_from_delta(shoulder_delta)
+                ),
+                verdict=_build_verdict(metrics, confidence),
+            )
+        )
+    return results
+
+
 class BodyComparisonService:
     def __init__(self) -> None:
         pass
@@ -161,3 +311,36 @@ class BodyComparisonService:
             from_keypoints=from_keypoints,
             to_keypoints=to_keypoints,
         )
+
+    async def analyze_many(
+        self,
+        *,
+        keypoints: Sequence[BodyKeypoints | np.ndarray],
+        pairs: Sequence[tuple[int, int]],
+    ) -> list[BodyMetricResult]:
+        """Analyze ``(from, to)`` index pairs into ``keypoints`` in a single vectorized pass."""
+
+        return _analyze_pairs(compute_batch_features(stack_keypoints(keypoints)), pairs)
+
+    async def analyze_photos(
+        self,
+        *,
+        photos: Sequence[BodyPhoto],
+        pairs: Sequence[tuple[int, int]],
+    ) -> list[BodyMetricResult]:
+        """Like ``analyze_many`` but reads the features precomputed on each ``BodyPhoto``."""
+
+        return _analyze_pairs(features_from_photos(photos), pairs)
+
+    async def analyze_matrix(
+        self, *, keypoints: Sequence[BodyKeypoints | np.ndarray]
+    ) -> BatchComparison:
+        return compare_matrix(compute_batch_features(stack_keypoints(keypoints)))
+
+
+def _analyze_pairs(
+    features: BatchFeatures, pairs: Sequence[tuple[int, int]]
+) -> list[BodyMetricResult]:
+    from_index = np.fromiter((pair[0] for pair in pairs), dtype=np.intp, count=len(pairs))
+    to_index = np.fromiter((pair[1] for pair in pairs), dtype=np.intp, count=len(pairs))
+    return build_metric_results(compare_batch(features, from_index, to_index))
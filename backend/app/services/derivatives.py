@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import importlib
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Protocol, Sequence
+
+import numpy as np
+from PIL import Image, ImageOps
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.models.body import BodyPhoto
+from app.services.ai_pose import PoseEstimationError, PoseEstimator, get_pose_pool
+from app.services.storage import StorageService, is_missing_object
+
+logger = logging.getLogger(__name__)
+
+# Bump when rendering changes so new outputs land under new keys.
+DERIVATIVE_VERSION = 1
+THUMBNAIL_SIZE = (256, 256)
+COMPARE_HEIGHT = 768
+COMPARE_MARGIN = 0.08
+
+DERIVATIVE_KINDS = ("thumbnail", "compare", "segmentation")
+_CONTENT_TYPES = {"thumbnail": "image/jpeg", "compare": "image/jpeg", "segmentation": "image/png"}
+
+
+class BackgroundRemover(Protocol):
+    def remove(self, image: Image.Image) -> Image.Image:
+        ...
+
+
+class BorderColorBackgroundRemover:
+    """Heuristic for tests and local runs: pixels close to the median border colour become transparent."""
+
+    def __init__(self, threshold: float = 40.0) -> None:
+        self.threshold = threshold
+
+    def remove(self, image: Image.Image) -> Image.Image:
+        rgb = np.asarray(image.convert("RGB"), dtype=np.float32)
+        border = np.concatenate((rgb[0], rgb[-1], rgb[:, 0], rgb[:, -1]))
+        distance = np.sqrt(((rgb - np.median(border, axis=0)) ** 2).sum(axis=-1))
+        result = image.convert("RGBA")
+        result.putalpha(Image.fromarray(np.where(distance > self.threshold, 255, 0).astype(np.uint8)))
+        return result
+
+
+def derivative_keys(user_id: str, content_sha256: str, keypoints_hash: str | None) -> dict[str, str]:
+    """Content-addressed keys under the owner's prefix: a user's identical originals
+    (and poses, for crops) share outputs."""
+
+    base = f"users/{user_id}/derivatives/v{DERIVATIVE_VERSION}/{content_sha256}"
+    pose = (keypoints_hash or "full")[:16]
+    return {
+        "thumbnail": f"{base}/thumbnail.jpg",
+        "compare": f"{base}/compare-{pose}.jpg",
+        "segmentation": f"{base}/segmentation.png",
+    }
+
+
+def _encode(image: Image.Image, kind: str) -> bytes:
+    buffer = io.BytesIO()
+    if _CONTENT_TYPES[kind] == "image/png":
+        image.save(buffer, format="PNG", optimize=True)
+    else:
+        image.convert("RGB").save(buffer, format="JPEG", quality=85, optimize=True)
+    return buffer.getvalue()
+
+
+def _compare_crop(image: Image.Image, keypoints: np.ndarray | None) -> Image.Image:
+    if keypoints is not None:
+        xy = keypoints[:, :2]
+        xy = xy[~np.isnan(xy).any(axis=1)]
+        if len(xy):
+            left, top = np.clip(xy.min(axis=0) - COMPARE_MARGIN, 0.0, 1.0)
+            right, bottom = np.clip(xy.max(axis=0) + COMPARE_MARGIN, 0.0, 1.0)
+            if right > left and bottom > top:
+                width, height = image.size
+                image = image.crop(
+                    (int(left * width), int(top * height), int(right * width), int(bottom * height))
+                )
+    scale = COMPARE_HEIGHT / image.height
+    if scale < 1:
+        image = image.resize((max(1, round(image.width * scale)), COMPARE_HEIGHT), Image.LANCZOS)
+    return image
+
+
+def render_derivatives(
+    original: bytes,
+    keypoints: np.ndarray | None,
+    kinds: Sequence[str],
+    remover: BackgroundRemover | None,
+) -> dict[str, bytes]:
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(original)))
+    rendered: dict[str, bytes] = {}
+    for kind in kinds:
+        if kind == "thumbnail":
+            thumbnail = image.copy()
+            thumbnail.thumbnail(THUMBNAIL_SIZE)
+            rendered[kind] = _encode(thumbnail, kind)
+        elif kind == "compare":
+            rendered[kind] = _encode(_compare_crop(image, keypoints), kind)
+        elif kind == "segmentation" and remover is not None:
+            rendered[kind] = _encode(remover.remove(image), kind)
+    return rendered
+
+
+@lru_cache
+def get_background_remover() -> BackgroundRemover | None:
+    """The configured ``background_remover``, or None when segmentation is disabled."""
+
+    path = get_settings().background_remover
+    if path is None:
+        return None
+    module_name, _, attribute = path.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)()
+
+
+@lru_cache
+def get_derivative_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(
+        max_workers=get_settings().derivative_workers, thread_name_prefix="derivatives"
+    )
+
+
+class DerivativePipeline:
+    """Produces thumbnail, compare-crop and background-removed variants of body photos.
+
+    Outputs are keyed by the SHA-256 of the original, computed on first processing and
+    stored on the photo, so existing variants are detected with HEAD requests and never
+    re-rendered or re-uploaded.
+    """
+
+    def __init__(
+        self,
+        storage: StorageService,
+        *,
+        executor: ThreadPoolExecutor | None = None,
+        remover: BackgroundRemover | None = None,
+    ) -> None:
+        self.storage = storage
+        self.executor = executor or get_derivative_executor()
+        self.remover = remover if remover is not None else get_background_remover()
+        self.kinds = tuple(
+            kind for kind in DERIVATIVE_KINDS if kind != "segmentation" or self.remover is not None
+        )
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def _download_original(self, photo: BodyPhoto, source_key: str) -> bytes:
+        try:
+            return await self._run(self.storage.download_object, source_key)
+        except Exception as exc:
+            if is_missing_object(exc):
+                raise FileNotFoundError(f"Original not uploaded yet for photo {photo.id}") from exc
+            raise
+
+    async def process(self, photo: BodyPhoto) -> dict[str, str]:
+        source_key = self.storage.object_key_from_url(photo.file_url)
+        original: bytes | None = None
+        if photo.content_sha256 is None:
+            original = await self._download_original(photo, source_key)
+            photo.content_sha256 = hashlib.sha256(original).hexdigest()
+        keys = derivative_keys(photo.user_id, photo.content_sha256, photo.keypoints_hash)
+
+        exists = await asyncio.gather(
+            *(self._run(self.storage.object_exists, keys[kind]) for kind in self.kinds)
+        )
+        missing = [kind for kind, found in zip(self.kinds, exists) if not found]
+        if missing:
+            if original is None:
+                original = await self._download_original(photo, source_key)
+            rendered = await self._run(
+                render_derivatives, original, photo.keypoints_array, missing, self.remover
+            )
+            await asyncio.gather(
+                *(
+                    self._run(self.storage.upload_object, keys[kind], data, _CONTENT_TYPES[kind])
+                    for kind, data in rendered.items()
+                )
+            )
+
+        photo.thumbnail_key = keys["thumbnail"]
+        photo.compare_key = keys["compare"]
+        if "segmentation" in self.kinds:
+            photo.segmentation_key = keys["segmentation"]
+        return keys
+
+
+async def process_photo_derivatives(
+    session_factory: async_sessionmaker[AsyncSession],
+    storage: StorageService,
+    user_id: str,
+    photo_ids: Sequence[str],
+) -> None:
+    """Background entry point; failures are logged per photo so one bad upload does not block others.
+
+    The upload has finished by now, so this is also where server-side keypoints are
+    estimated (when a pose model is configured) before the pose-dependent crops render.
+    """
+
+    pipeline = DerivativePipeline(storage)
+    async with session_factory() as session:
+        photos = (await session.scalars(
+            select(BodyPhoto).where(BodyPhoto.user_id == user_id, BodyPhoto.id.in_(photo_ids))
+        )).all()
+        pool = get_pose_pool()
+        if pool is not None:
+            try:
+                await PoseEstimator(pool, storage).ensure_keypoints(photos)
+            except PoseEstimationError as exc:
+                logger.warning("pose estimation failed during derivatives: %s", exc)
+        results = await asyncio.gather(
+            *(pipeline.process(photo) for photo in photos), return_exceptions=True
+        )
+        for photo, result in zip(photos, results):
+            if isinstance(result, Exception):
+                logger.warning("derivatives failed for photo %s: %s", photo.id, result)
+        await session.commit()
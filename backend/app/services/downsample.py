@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices kept by Largest-Triangle-Three-Buckets downsampling to ``threshold`` points.
+
+    ``x`` is ``(N,)`` and ascending; ``y`` is ``(N,)`` or ``(N, M)``. With several columns
+    the triangle areas are summed after scaling each column to unit range, so every series
+    contributes to the shape. The first and last points are always kept.
+    """
+
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64).reshape(n, -1)
+    span = np.ptp(y, axis=0)
+    y = (y - y.min(axis=0)) / np.where(span > 0, span, 1.0)
+
+    # Bucket i (for the threshold - 2 interior points) covers [edges[i], edges[i + 1]).
+    edges = (np.arange(threshold - 1) * ((n - 2) / (threshold - 2))).astype(np.intp) + 1
+    edges[-1] = n - 1
+    selected = np.empty(threshold, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    anchor = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean(axis=0)
+        ax, ay = x[anchor], y[anchor]
+        areas = np.abs(
+            (ax - next_x) * (y[start:end] - ay) - (ax - x[start:end])[:, None] * (next_y - ay)
+        ).sum(axis=1)
+        anchor = start + int(np.argmax(areas))
+        selected[bucket + 1] = anchor
+    return selected
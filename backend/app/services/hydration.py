@@ -1,8 +1,14 @@
 from __future__ import annotations
 
-from collections import defaultdict
-from datetime import date
+import time
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Callable
 
+from redis.asyncio import Redis
+
+from app.core.config import get_settings
+from app.core.redis import get_redis
 from app.schemas.hydration import (
     HydrationGoalRequest,
     HydrationGoalResponse,
@@ -11,37 +17,161 @@ from app.schemas.hydration import (
     HydrationSummaryResponse,
 )
 
+DEFAULT_GOAL_ML = 2000
+
+
+class InMemoryHydrationStore:
+    """Per-process counters with the same semantics as ``RedisHydrationStore``.
+
+    Like the Redis keys, each day total and the streak expire ``retention_days`` after
+    their last write, whatever day they are for; the goal never expires.
+    """
+
+    def __init__(self, retention_days: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self.retention_seconds = retention_days * 86400
+        self.clock = clock
+        self._goals: dict[str, int] = {}
+        # Values with the clock reading at which they expire.
+        self._days: dict[tuple[str, date], tuple[int, float]] = {}
+        self._streak: dict[str, tuple[int, float]] = {}
+        self._next_sweep = 0.0
+
+    def _live(self, entries: dict, key, now: float) -> int:
+        entry = entries.get(key)
+        if entry is None:
+            return 0
+        if entry[1] <= now:
+            del entries[key]
+            return 0
+        return entry[0]
+
+    def _sweep(self, now: float) -> None:
+        # Keys nobody reads again would otherwise stay forever; Redis expires them itself.
+        if now < self._next_sweep:
+            return
+        for entries in (self._days, self._streak):
+            for key in [key for key, (_, expires_at) in entries.items() if expires_at <= now]:
+                del entries[key]
+        self._next_sweep = now + min(self.retention_seconds, 3600)
+
+    async def set_goal(self, user_id: str, daily_ml: int) -> None:
+        self._goals[user_id] = daily_ml
+
+    async def add(self, user_id: str, day: date, amount_ml: int) -> tuple[int, int, int]:
+        """Add to the day's total and update the streak; returns ``(total, goal, streak)``."""
+
+        now = self.clock()
+        self._sweep(now)
+        expires_at = now + self.retention_seconds
+        total = self._live(self._days, (user_id, day), now) + amount_ml
+        self._days[(user_id, day)] = (total, expires_at)
+        goal = self._goals.get(user_id, DEFAULT_GOAL_ML)
+        streak = self._live(self._streak, user_id, now) + 1 if total >= goal else 0
+        self._streak[user_id] = (streak, expires_at)
+        return total, goal, streak
+
+    async def snapshot(self, user_id: str, day: date) -> tuple[int, int, int]:
+        """``(consumed, goal, streak)`` for ``day``."""
+
+        now = self.clock()
+        return (
+            self._live(self._days, (user_id, day), now),
+            self._goals.get(user_id, DEFAULT_GOAL_ML),
+            self._live(self._streak, user_id, now),
+        )
+
+
+class RedisHydrationStore:
+    """Counters shared by every worker.
+
+    Each user-day total is a Redis integer bumped with ``INCRBY`` and expiring after
+    ``retention_days``; a log costs two pipelined round trips, one to add and read the
+    goal, one to move the streak.
+    """
+
+    key_prefix = "hydration:"
+
+    def __init__(self, redis: Redis, retention_days: int) -> None:
+        self.redis = redis
+        self.retention_days = retention_days
+
+    def _day_key(self, user_id: str, day: date) -> str:
+        return f"{self.key_prefix}{user_id}:day:{day.isoformat()}"
+
+    def _goal_key(self, user_id: str) -> str:
+        return f"{self.key_prefix}{user_id}:goal"
+
+    def _streak_key(self, user_id: str) -> str:
+        return f"{self.key_prefix}{user_id}:streak"
+
+    async def set_goal(self, user_id: str, daily_ml: int) -> None:
+        await self.redis.set(self._goal_key(user_id), daily_ml)
+
+    async def add(self, user_id: str, day: date, amount_ml: int) -> tuple[int, int, int]:
+        day_key = self._day_key(user_id, day)
+        retention = timedelta(days=self.retention_days)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.incrby(day_key, amount_ml)
+            pipe.expire(day_key, retention)
+            pipe.get(self._goal_key(user_id))
+            total, _, goal = await pipe.execute()
+        total = int(total)
+        goal = DEFAULT_GOAL_ML if goal is None else int(goal)
+
+        streak_key = self._streak_key(user_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            if total >= goal:
+                pipe.incr(streak_key)
+            else:
+                pipe.set(streak_key, 0)
+            # A streak nobody has touched for the whole retention window is stale anyway.
+            pipe.expire(streak_key, retention)
+            streak, _ = await pipe.execute()
+        return total, goal, int(streak) if total >= goal else 0
+
+    async def snapshot(self, user_id: str, day: date) -> tuple[int, int, int]:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.get(self._day_key(user_id, day))
+            pipe.get(self._goal_key(user_id))
+            pipe.get(self._streak_key(user_id))
+            consumed, goal, streak = await pipe.execute()
+        return (
+            int(consumed or 0),
+            DEFAULT_GOAL_ML if goal is None else int(goal),
+            int(streak or 0),
+        )
+
 
 class HydrationService:
-    def __init__(self) -> None:
-        self._goals: dict[str, tuple[int, date]] = {}
-        self._logs: dict[str, dict[date, int]] = defaultdict(lambda: defaultdict(int))
-        self._streak: dict[str, int] = defaultdict(int)
-
-    def set_goal(self, user_id: str, payload: HydrationGoalRequest) -> HydrationGoalResponse:
-        today = date.today()
-        self._goals[user_id] = (payload.daily_ml, today)
-        return HydrationGoalResponse(daily_ml=payload.daily_ml, updated_at=today)
-
-    def log(self, user_id: str, payload: HydrationLogRequest) -> HydrationLogResponse:
-        goal, _ = self._goals.get(user_id, (2000, date.today()))
-        self._logs[user_id][payload.timestamp] += payload.amount_ml
-        consumed = self._logs[user_id][payload.timestamp]
+    def __init__(self, store: InMemoryHydrationStore | RedisHydrationStore) -> None:
+        self.store = store
+
+    async def set_goal(self, user_id: str, payload: HydrationGoalRequest) -> HydrationGoalResponse:
+        await self.store.set_goal(user_id, payload.daily_ml)
+        return HydrationGoalResponse(daily_ml=payload.daily_ml, updated_at=date.today())
+
+    async def log(self, user_id: str, payload: HydrationLogRequest) -> HydrationLogResponse:
+        consumed, goal, _ = await self.store.add(user_id, payload.timestamp, payload.amount_ml)
         remaining = max(goal - consumed, 0)
-        if consumed >= goal:
-            self._streak[user_id] += 1
-        else:
-            self._streak[user_id] = 0
         return HydrationLogResponse(total_ml=consumed, goal_ml=goal, remaining_ml=remaining)
 
-    def summary(self, user_id: str) -> HydrationSummaryResponse:
-        goal, _ = self._goals.get(user_id, (2000, date.today()))
-        today = date.today()
-        consumed = self._logs[user_id][today]
+    async def summary(self, user_id: str) -> HydrationSummaryResponse:
+        consumed, goal, streak = await self.store.snapshot(user_id, date.today())
         completion = round((consumed / goal) * 100, 2) if goal else 0.0
         return HydrationSummaryResponse(
             goal_ml=goal,
             consumed_ml=consumed,
             completion_pct=completion,
-            streak_days=self._streak[user_id],
+            streak_days=streak,
         )
+
+
+@lru_cache
+def get_hydration_service() -> HydrationService:
+    """Process-wide service; counters live in Redis whenever ``redis_url`` is configured."""
+
+    retention_days = get_settings().hydration_retention_days
+    redis = get_redis()
+    if redis is None:
+        return HydrationService(InMemoryHydrationStore(retention_days))
+    return HydrationService(RedisHydrationStore(redis, retention_days))
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Callable, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models.body import BodyPhoto
+
+
+# Capture values assumed when the client did not report them, so such photos still index.
+DEFAULT_DISTANCE_CM = 200.0
+DEFAULT_CAMERA_HEIGHT_CM = 120.0
+
+# Divisors putting each dimension on a comparable scale: 50 cm of distance, 25 cm of
+# camera height and 0.05 torso-lengths of width/height drift each count as one unit.
+_SCALES = (50.0, 25.0, 0.05, 0.05, 0.05)
+
+
+def _timestamp(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def photo_features(photo: Any) -> tuple[float, ...] | None:
+    """Scaled capture + pose vector for ``photo``; None while its pose features are unknown."""
+
+    if photo.shoulders_ratio is None or photo.hip_ratio is None or photo.shoulder_y is None:
+        return None
+    raw = (
+        DEFAULT_DISTANCE_CM if photo.distance_cm is None else float(photo.distance_cm),
+        DEFAULT_CAMERA_HEIGHT_CM if photo.camera_height_cm is None else float(photo.camera_height_cm),
+        photo.shoulders_ratio,
+        photo.hip_ratio,
+        photo.shoulder_y,
+    )
+    return tuple(value / scale for value, scale in zip(raw, _SCALES))
+
+
+@dataclass
+class PhotoMatch:
+    photo_id: str
+    distance: float
+
+
+class _Node:
+    __slots__ = ("point", "photo_id", "taken_at", "axis", "left", "right")
+
+    def __init__(self, point: tuple[float, ...], photo_id: str, taken_at: float, axis: int) -> None:
+        self.point = point
+        self.photo_id = photo_id
+        self.taken_at = taken_at
+        self.axis = axis
+        self.left: _Node | None = None
+        self.right: _Node | None = None
+
+
+class PhotoKDTree:
+    """KD-tree over photo feature vectors supporting incremental inserts and removals.
+
+    Removed or re-inserted photos leave their old node in place as a stale entry; the
+    tree is rebuilt once stale entries outnumber live ones, keeping updates amortized
+    O(log n).
+    """
+
+    def __init__(self, dimensions: int = len(_SCALES)) -> None:
+        self.dimensions = dimensions
+        self._root: _Node | None = None
+        # Live node per photo; any other node reachable from the root is stale.
+        self._nodes: dict[str, _Node] = {}
+        self._stale = 0
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, photo_id: str) -> bool:
+        return photo_id in self._nodes
+
+    @classmethod
+    def build(cls, entries: Sequence[tuple[str, datetime, tuple[float, ...]]]) -> "PhotoKDTree":
+        """Balanced bulk build from ``(photo_id, taken_at, point)`` entries."""
+
+        tree = cls()
+        tree._root = tree._build(
+            [(point, photo_id, _timestamp(taken_at)) for photo_id, taken_at, point in entries], 0
+        )
+        return tree
+
+    def _build(self, items: list, depth: int) -> _Node | None:
+        if not items:
+            return None
+        axis = depth % self.dimensions
+        items.sort(key=lambda item: item[0][axis])
+        median = len(items) // 2
+        point, photo_id, taken_at = items[median]
+        node = _Node(point, photo_id, taken_at, axis)
+        self._nodes[photo_id] = node
+        node.left = self._build(items[:median], depth + 1)
+        node.right = self._build(items[median + 1:], depth + 1)
+        return node
+
+    def insert(self, photo_id: str, taken_at: datetime, point: tuple[float, ...]) -> None:
+        if photo_id in self._nodes:
+            # Features changed (e.g. re-estimated keypoints): the old node goes stale.
+            self._stale += 1
+        node = _Node(point, photo_id, _timestamp(taken_at), 0)
+        self._nodes[photo_id] = node
+        if self._root is None:
+            self._root = node
+        else:
+            parent = self._root
+            while True:
+                node.axis = (parent.axis + 1) % self.dimensions
+                if point[parent.axis] < parent.point[parent.axis]:
+                    if parent.left is None:
+                        parent.left = node
+                        break
+                    parent = parent.left
+                else:
+                    if parent.right is None:
+                        parent.right = node
+                        break
+                    parent = parent.right
+        self._compact()
+
+    def remove(self, photo_id: str) -> None:
+        if self._nodes.pop(photo_id, None) is not None:
+            self._stale += 1
+            self._compact()
+
+    def _compact(self) -> None:
+        if self._stale <= len(self._nodes):
+            return
+        items = [(node.point, photo_id, node.taken_at) for photo_id, node in self._nodes.items()]
+        self._nodes = {}
+        self._stale = 0
+        self._root = self._build(items, 0)
+
+    def nearest(
+        self,
+        point: tuple[float, ...],
+        accept: Callable[[str, float], bool] = lambda photo_id, taken_at: True,
+    ) -> PhotoMatch | None:
+        """Closest indexed photo for which ``accept(photo_id, taken_at_timestamp)`` holds."""
+
+        best_id: str | None = None
+        best_sq = float("inf")
+        # Entries carry the squared distance to the splitting plane that led to them.
+        stack: list[tuple[_Node | None, float]] = [(self._root, 0.0)]
+        while stack:
+            node, plane_sq = stack.pop()
+            if node is None or plane_sq >= best_sq:
+                continue
+            sq = sum((a - b) ** 2 for a, b in zip(point, node.point))
+            if (
+                sq < best_sq
+                and self._nodes.get(node.photo_id) is node
+                and accept(node.photo_id, node.taken_at)
+            ):
+                best_id, best_sq = node.photo_id, sq
+            diff = point[node.axis] - node.point[node.axis]
+            near, far = (node.left, node.right) if diff < 0 else (node.right, node.left)
+            stack.append((far, diff * diff))
+            stack.append((near, 0.0))
+        if best_id is None:
+            return None
+        return PhotoMatch(photo_id=best_id, distance=best_sq ** 0.5)
+
+    def nearest_before(
+        self, point: tuple[float, ...], taken_at: datetime, exclude: str
+    ) -> PhotoMatch | None:
+        cutoff = _timestamp(taken_at)
+        return self.nearest(
+            point, lambda photo_id, timestamp: photo_id != exclude and timestamp < cutoff
+        )
+
+
+class PhotoIndexCache:
+    """LRU of per ``(user_id, view)`` KD-trees, built lazily from the database.
+
+    Trees are kept current by ``observe`` in this process; the TTL bounds how long
+    writes made by other workers can go unseen.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple[str, str], tuple[float, PhotoKDTree]] = OrderedDict()
+
+    async def get(self, session: AsyncSession, user_id: str, view: str) -> PhotoKDTree:
+        key = (user_id, view)
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        rows = (await session.execute(
+            select(
+                BodyPhoto.id,
+                BodyPhoto.taken_at,
+                BodyPhoto.distance_cm,
+                BodyPhoto.camera_height_cm,
+                BodyPhoto.shoulders_ratio,
+                BodyPhoto.hip_ratio,
+                BodyPhoto.shoulder_y,
+            ).where(
+                BodyPhoto.user_id == user_id,
+                BodyPhoto.view == view,
+                BodyPhoto.shoulders_ratio.is_not(None),
+            )
+        )).all()
+        tree = PhotoKDTree.build(
+            [
+                (row.id, row.taken_at, point)
+                for row in rows
+                if (point := photo_features(row)) is not None
+            ]
+        )
+        self._entries[key] = (time.monotonic(), tree)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return tree
+
+    def observe(self, photo: BodyPhoto) -> None:
+        """Fold a new or re-estimated photo into its tree if that tree is loaded."""
+
+        entry = self._entries.get((photo.user_id, photo.view))
+        if entry is None or photo.id is None:
+            return
+        point = photo_features(photo)
+        if point is None:
+            entry[1].remove(photo.id)
+        else:
+            entry[1].insert(photo.id, photo.taken_at, point)
+
+    def discard(self, user_id: str, view: str, photo_id: str) -> None:
+        entry = self._entries.get((user_id, view))
+        if entry is not None:
+            entry[1].remove(photo_id)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+@lru_cache
+def get_photo_index() -> PhotoIndexCache:
+    settings = get_settings()
+    return PhotoIndexCache(
+        max_entries=settings.photo_index_cache_size,
+        ttl_seconds=settings.photo_index_ttl_seconds,
+    )
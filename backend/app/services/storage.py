@@ -1,30 +1,100 @@
 from datetime import timedelta
+from functools import lru_cache
 from typing import Any
+from urllib.parse import quote
 
 import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
 
-from app.core.config import get_settings
+from app.core.config import Settings, get_settings
+from app.services.s3_signer import SigV4Signer
+
+_DEFAULT_EXPIRES_IN = int(timedelta(minutes=10).total_seconds())
+
+
+def is_missing_object(exc: BaseException) -> bool:
+    """True when ``exc`` is S3 reporting that the object does not exist (yet)."""
+
+    return isinstance(exc, ClientError) and exc.response.get("Error", {}).get("Code") in {
+        "404",
+        "NoSuchKey",
+        "NotFound",
+    }
+
+
+def build_s3_client(settings: Settings):
+    session = boto3.session.Session()
+    return session.client(
+        "s3",
+        endpoint_url=str(settings.s3_endpoint_url) if settings.s3_endpoint_url else None,
+        region_name=settings.s3_region,
+        aws_access_key_id=settings.s3_access_key,
+        aws_secret_access_key=settings.s3_secret_key,
+        use_ssl=settings.s3_use_ssl,
+        config=Config(
+            signature_version="s3v4",
+            max_pool_connections=settings.s3_max_pool_connections,
+            connect_timeout=settings.s3_connect_timeout_seconds,
+            read_timeout=settings.s3_read_timeout_seconds,
+            retries={"max_attempts": settings.s3_max_attempts, "mode": "standard"},
+        ),
+    )
+
+
+def build_s3_signer(settings: Settings) -> SigV4Signer | None:
+    if not (settings.s3_access_key and settings.s3_secret_key):
+        return None
+    return SigV4Signer(
+        access_key=settings.s3_access_key,
+        secret_key=settings.s3_secret_key,
+        region=settings.s3_region,
+    )
+
+
+def s3_bucket_url(settings: Settings) -> str:
+    """Bucket URL as botocore addresses it: path-style on custom endpoints, virtual host on AWS."""
+
+    if settings.s3_endpoint_url:
+        return f"{str(settings.s3_endpoint_url).rstrip('/')}/{settings.s3_bucket}"
+    scheme = "https" if settings.s3_use_ssl else "http"
+    return f"{scheme}://{settings.s3_bucket}.s3.amazonaws.com/"
+
+
+@lru_cache
+def get_s3_client():
+    """Process-wide S3 client; botocore clients are thread-safe and pool their connections."""
+
+    return build_s3_client(get_settings())
+
+
+@lru_cache
+def get_s3_signer() -> SigV4Signer | None:
+    return build_s3_signer(get_settings())
 
 
 class StorageService:
-    def __init__(self) -> None:
+    def __init__(self, client=None, signer: SigV4Signer | None = None) -> None:
         settings = get_settings()
-        session = boto3.session.Session()
-        self.client = session.client(
-            "s3",
-            endpoint_url=str(settings.s3_endpoint_url) if settings.s3_endpoint_url else None,
-            region_name=settings.s3_region,
-            aws_access_key_id=settings.s3_access_key,
-            aws_secret_access_key=settings.s3_secret_key,
-            use_ssl=settings.s3_use_ssl,
-        )
+        self.client = client or get_s3_client()
+        self.signer = signer or get_s3_signer()
         self.bucket = settings.s3_bucket
+        self._bucket_url = s3_bucket_url(settings)
 
     def generate_presigned_upload(
-        self, *, key: str, expires_in: int = int(timedelta(minutes=10).total_seconds())
+        self, *, key: str, expires_in: int = _DEFAULT_EXPIRES_IN
     ) -> dict[str, Any]:
         fields = {"acl": "private"}
         conditions = [["eq", "$acl", "private"]]
+        if self.signer is not None:
+            return self.signer.presign_post(
+                url=self._bucket_url,
+                bucket=self.bucket,
+                key=key,
+                fields=fields,
+                conditions=conditions,
+                expires_in=expires_in,
+            )
         return self.client.generate_presigned_post(
             Bucket=self.bucket,
             Key=key,
@@ -33,8 +103,49 @@ class StorageService:
             ExpiresIn=expires_in,
         )
 
+    def generate_presigned_download(self, key: str, expires_in: int = _DEFAULT_EXPIRES_IN) -> str:
+        if self.signer is not None:
+            url = f"{self._bucket_url.rstrip('/')}/{quote(key, safe='/~')}"
+            return self.signer.presign_get(url=url, expires_in=expires_in)
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": key},
+            ExpiresIn=expires_in,
+        )
+
+    def download_object(self, key: str) -> bytes:
+        response = self.client.get_object(Bucket=self.bucket, Key=key)
+        return response["Body"].read()
+
+    def upload_object(self, key: str, data: bytes, content_type: str) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data, ContentType=content_type)
+
+    def object_etag(self, key: str) -> str | None:
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as exc:
+            if is_missing_object(exc):
+                return None
+            raise
+        return response["ETag"].strip('"')
+
+    def object_exists(self, key: str) -> bool:
+        return self.object_etag(key) is not None
+
+    def object_key_from_url(self, url: str) -> str:
+        prefix = self.build_object_url("")
+        if not url.startswith(prefix):
+            raise ValueError(f"URL does not belong to bucket {self.bucket}: {url}")
+        return url[len(prefix):]
+
     def build_object_url(self, key: str) -> str:
         settings = get_settings()
         if settings.s3_endpoint_url:
             return f"{settings.s3_endpoint_url}/{self.bucket}/{key}"
         return f"https://{self.bucket}.s3.{settings.s3_region}.amazonaws.com/{key}"
+
+
+def get_storage_service() -> StorageService:
+    """FastAPI dependency; override it to point handlers at a local S3 stand-in."""
+
+    return StorageService()
@@ -1,4 +1,5 @@
 import asyncio
+import os
 from collections.abc import AsyncGenerator, Generator
 from typing import Any
 
@@ -6,8 +7,11 @@ import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
-from app.core.database import get_session
-from app.core.deps import get_current_user
+# Tests run the deterministic stand-in; production must configure a real model.
+os.environ.setdefault("POSE_MODEL", "app.services.ai_pose:StandInPoseModel")
+
+from app.core.database import get_session, get_session_factory
+from app.core.deps import get_current_user, get_read_session
 from app.main import app
 from app.models import Base, User
 
@@ -53,6 +57,8 @@ async def override_dependencies(session_factory, seed_user, monkeypatch):
         return seed_user
 
     app.dependency_overrides[get_session] = _get_session
+    app.dependency_overrides[get_read_session] = _get_session
+    app.dependency_overrides[get_session_factory] = lambda: session_factory
     app.dependency_overrides[get_current_user] = _get_user
 
     from app.services import storage as storage_module
@@ -64,11 +70,17 @@ async def override_dependencies(session_factory, seed_user, monkeypatch):
     def fake_presign(self, *, key: str, expires_in: int = 600) -> dict[str, Any]:
         return {"url": f"https://example.com/upload/{key}", "fields": {"key": key}}
 
+    def fake_download(self, key: str, expires_in: int = 600) -> str:
+        return f"https://example.com/download/{key}"
+
     def fake_url(self, key: str) -> str:
         return f"https://cdn.example.com/{key}"
 
     monkeypatch.setattr(storage_module.StorageService, "__init__", fake_init)
     monkeypatch.setattr(storage_module.StorageService, "generate_presigned_upload", fake_presign)
+    monkeypatch.setattr(
+        storage_module.StorageService, "generate_presigned_download", fake_download
+    )
     monkeypatch.setattr(storage_module.StorageService, "build_object_url", fake_url)
 
     yield
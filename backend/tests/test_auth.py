@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+from redis.exceptions import RedisError
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.auth_cache import TokenCache, get_token_cache, get_user_cache
+from app.core.deps import get_current_user
+from app.core.security import create_token
+from app.models import User
+
+
+def test_current_user_is_served_from_caches_until_invalidated(
+    session_factory: async_sessionmaker, seed_user: User, test_engine
+):
+    token_cache, user_cache = get_token_cache(), get_user_cache()
+    token_cache.clear()
+    user_cache.clear()
+    token = create_token(seed_user.id)
+
+    statements: list[str] = []
+    event.listen(
+        test_engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+
+    async def _resolve() -> User:
+        async with session_factory() as session:
+            return await get_current_user(token, session, token_cache, user_cache)
+
+    loop = asyncio.get_event_loop()
+    assert loop.run_until_complete(_resolve()).id == seed_user.id
+    assert len(statements) == 1
+
+    cached = loop.run_until_complete(_resolve())
+    assert cached.id == seed_user.id and cached.is_active
+    assert "hashed_password" not in cached.__dict__
+    assert len(statements) == 1
+
+    async def _deactivate() -> None:
+        async with session_factory() as session:
+            user = await session.scalar(select(User).where(User.id == seed_user.id))
+            user.is_active = False
+            await session.commit()
+
+    loop.run_until_complete(_deactivate())
+    statements.clear()
+    assert loop.run_until_complete(_resolve()).is_active is False
+    assert len(statements) == 1
+
+
+def test_token_cache_drops_entries_at_expiry():
+    cache = TokenCache(max_entries=2)
+    cache.put("live", {"sub": "a", "exp": time.time() + 60})
+    cache.put("expired", {"sub": "b", "exp": time.time() - 1})
+    cache.put("no-exp", {"sub": "c"})
+
+    assert cache.get("live")["sub"] == "a"
+    assert cache.get("expired") is None
+    assert cache.get("no-exp") is None
+
+    cache.put("other", {"sub": "d", "exp": time.time() + 60})
+    cache.put("third", {"sub": "e", "exp": time.time() + 60})
+    assert cache.get("live") is None
+
+
+def test_shared_invalidation_is_tracked_and_failures_logged(
+    session_factory: async_sessionmaker, seed_user: User, monkeypatch, caplog
+):
+    deleted: list[tuple[str, ...]] = []
+
+    class FlakyRedis:
+        async def delete(self, *keys: str) -> int:
+            deleted.append(keys)
+            if len(deleted) > 1:
+                raise RedisError("connection reset")
+            return len(keys)
+
+    monkeypatch.setattr(get_user_cache(), "redis", FlakyRedis())
+
+    async def _toggle(active: bool) -> None:
+        async with session_factory() as session:
+            user = await session.scalar(select(User).where(User.id == seed_user.id))
+            user.is_active = active
+            await session.commit()
+        # Let the scheduled delete run.
+        await asyncio.sleep(0)
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(_toggle(False))
+    assert deleted == [(f"auth:user:{seed_user.id}",)]
+    assert "failed" not in caplog.text
+
+    with caplog.at_level(logging.WARNING, logger="app.core.redis"):
+        loop.run_until_complete(_toggle(True))
+    assert len(deleted) == 2
+    assert "auth user cache invalidation failed: connection reset" in caplog.text
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
-from datetime import date
+import asyncio
+from datetime import date, timedelta
 
 from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models import BioimpedanceRecord, User
 
 
 def test_bioimpedance_crud(client: TestClient) -> None:
@@ -38,3 +42,199 @@ def test_bioimpedance_crud(client: TestClient) -> None:
 
     delete = client.delete(f"/api/bioimpedance/{record['id']}")
     assert delete.status_code == 204
+
+
+def test_bioimpedance_range_queries_stay_sorted(client: TestClient) -> None:
+    for day in (20, 5, 12, 1):
+        response = client.post(
+            "/api/bioimpedance/",
+            json={
+                "measured_at": date(2024, 3, day).isoformat(),
+                "weight_kg": 80 + day / 10,
+                "fat_pct": 20 - day / 10,
+                "muscle_pct": 38.0,
+            },
+        )
+        assert response.status_code == 201
+
+    listing = client.get("/api/bioimpedance/")
+    assert [item["measured_at"] for item in listing.json()] == [
+        "2024-03-01",
+        "2024-03-05",
+        "2024-03-12",
+        "2024-03-20",
+    ]
+
+    ranged = client.get(
+        "/api/bioimpedance/", params={"from": "2024-03-05", "to": "2024-03-12"}
+    ).json()
+    assert [item["measured_at"] for item in ranged] == ["2024-03-05", "2024-03-12"]
+
+    limited = client.get("/api/bioimpedance/", params={"from": "2024-03-02", "limit": 1}).json()
+    assert [item["measured_at"] for item in limited] == ["2024-03-05"]
+
+    summary = client.get("/api/bioimpedance/summary").json()
+    assert summary["trend"] == "queda"
+
+
+def test_bioimpedance_summary_tracks_running_aggregates(client: TestClient) -> None:
+    today = date.today()
+    ids = []
+    for days_ago, fat in ((100, 22.0), (60, 21.0), (20, 20.0), (0, 19.0)):
+        response = client.post(
+            "/api/bioimpedance/",
+            json={
+                "measured_at": (today - timedelta(days=days_ago)).isoformat(),
+                "weight_kg": 80.0,
+                "fat_pct": fat,
+                "muscle_pct": 40.0,
+            },
+        )
+        ids.append(response.json()["id"])
+
+    summary = client.get("/api/bioimpedance/summary", params={"include_points": False}).json()
+    assert summary["points"] == []
+    assert summary["count"] == 4
+    assert summary["mean_fat_pct"] == 20.5
+    assert summary["fat_pct_slope_per_week"] < 0
+    assert summary["muscle_pct_slope_per_week"] == 0
+    assert summary["trend"] == "queda"
+    assert [(w["days"], w["count"]) for w in summary["windows"]] == [(30, 2), (90, 3)]
+    assert summary["windows"][0]["fat_change_pct"] == -1.0
+
+    client.put(f"/api/bioimpedance/{ids[-1]}", json={"fat_pct": 23.0})
+    client.delete(f"/api/bioimpedance/{ids[0]}")
+    summary = client.get("/api/bioimpedance/summary").json()
+    assert summary["count"] == 3
+    assert summary["mean_fat_pct"] == (21.0 + 20.0 + 23.0) / 3
+    assert summary["fat_pct_slope_per_week"] > 0
+    assert summary["trend"] == "estável"
+    assert len(summary["points"]) == 3
+
+
+def test_bioimpedance_summary_downsamples_preserving_extremes(client: TestClient) -> None:
+    start = date(2024, 1, 1)
+    for day in range(30):
+        client.post(
+            "/api/bioimpedance/",
+            json={
+                "measured_at": (start + timedelta(days=day)).isoformat(),
+                "weight_kg": 80.0,
+                "fat_pct": 30.0 if day == 17 else 20.0,
+                "muscle_pct": 40.0,
+            },
+        )
+
+    points = client.get("/api/bioimpedance/summary", params={"max_points": 6}).json()["points"]
+    assert len(points) == 6
+    dates = [point["measured_at"] for point in points]
+    assert dates == sorted(dates)
+    assert dates[0] == "2024-01-01" and dates[-1] == "2024-01-30"
+    assert max(point["fat_pct"] for point in points) == 30.0
+
+    full = client.get("/api/bioimpedance/summary", params={"max_points": 100}).json()["points"]
+    assert len(full) == 30
+
+
+def test_bioimpedance_csv_import_reports_row_errors(client: TestClient) -> None:
+    rows = ["Date;Weight;Body Fat;Muscle;Visceral Fat"]
+    for day in range(1, 29):
+        rows.append(f"2024-02-{day:02d} 07:30:00;{80 - day / 10:.1f};{20 - day / 20:.2f};38,5;")
+    rows.append("2024-03-01;81;95;38;")
+    rows.append("not-a-date;81;19;38;")
+    body = ("\n".join(rows) + "\n").encode()
+
+    def chunks():
+        for start in range(0, len(body), 37):
+            yield body[start:start + 37]
+
+    response = client.post(
+        "/api/bioimpedance/import", content=chunks(), headers={"Content-Type": "text/csv"}
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["imported"] == 28
+    assert result["failed"] == 2
+    assert [error["line"] for error in result["errors"]] == [30, 31]
+    assert result["errors"][0]["errors"][0].startswith("fat_pct")
+
+    listing = client.get("/api/bioimpedance/").json()
+    assert len(listing) == 28
+    assert listing[0]["measured_at"] == "2024-02-01"
+    assert listing[0]["muscle_pct"] == 38.5
+    assert client.get("/api/bioimpedance/summary").json()["count"] == 28
+
+
+def test_bioimpedance_csv_import_requires_columns(client: TestClient) -> None:
+    response = client.post(
+        "/api/bioimpedance/import",
+        content=b"date,weight\n2024-01-01,80\n",
+        headers={"Content-Type": "text/csv"},
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"] == "Missing required columns: fat_pct, muscle_pct"
+
+    empty = client.post("/api/bioimpedance/import", content=b"", headers={"Content-Type": "text/csv"})
+    assert empty.status_code == 422
+
+
+def test_bioimpedance_csv_import_keeps_quoted_newlines(client: TestClient) -> None:
+    body = (
+        'date,weight,fat,muscle,note\r\n'
+        '2024-04-01,80,19,38,"after run\r\nfelt ""great"""\r\n'
+        '2024-04-02,81,19,38,plain\r\n'
+        '2024-04-03,81,99,38,"multi\nline\nnote"\r\n'
+        '2024-04-04,82,19,38,\r\n'
+        'bad-date,82,19,38,"x"\r\n'
+    ).encode()
+
+    def chunks():
+        # Tiny chunks cut through quoted cells and \r\n pairs alike.
+        for start in range(0, len(body), 5):
+            yield body[start:start + 5]
+
+    response = client.post(
+        "/api/bioimpedance/import", content=chunks(), headers={"Content-Type": "text/csv"}
+    )
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["imported"] == 3
+    # Reported by the physical line each record starts on, counting quoted line breaks.
+    assert [error["line"] for error in result["errors"]] == [5, 9]
+
+
+def test_bioimpedance_listing_is_not_truncated_by_default(client: TestClient) -> None:
+    start = date(2020, 1, 1)
+    rows = ["measured_at,weight_kg,fat_pct,muscle_pct"] + [
+        f"{(start + timedelta(days=day)).isoformat()},80,20,38" for day in range(1200)
+    ]
+    imported = client.post(
+        "/api/bioimpedance/import",
+        content="\n".join(rows).encode(),
+        headers={"Content-Type": "text/csv"},
+    )
+    assert imported.json()["imported"] == 1200
+
+    assert len(client.get("/api/bioimpedance/").json()) == 1200
+    assert len(client.get("/api/bioimpedance/", params={"limit": 50}).json()) == 50
+
+
+def test_bioimpedance_listing_sees_writes_from_other_workers(
+    client: TestClient, session_factory: async_sessionmaker, seed_user: User
+) -> None:
+    payload = {"weight_kg": 80.0, "fat_pct": 20.0, "muscle_pct": 38.0}
+    client.post("/api/bioimpedance/", json={"measured_at": "2024-04-01", **payload})
+    assert client.get("/api/bioimpedance/summary").json()["count"] == 1
+
+    async def _write_elsewhere() -> str:
+        async with session_factory() as session:
+            row = BioimpedanceRecord(user_id=seed_user.id, measured_at=date(2024, 4, 2), **payload)
+            session.add(row)
+            await session.commit()
+            return row.id
+
+    record_id = asyncio.get_event_loop().run_until_complete(_write_elsewhere())
+
+    listing = client.get("/api/bioimpedance/", params={"from": "2024-04-02"}).json()
+    assert [item["id"] for item in listing] == [record_id]
+    assert client.get(f"/api/bioimpedance/{record_id}").status_code == 200
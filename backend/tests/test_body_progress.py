@@ -1,14 +1,62 @@
 from __future__ import annotations
 
 import asyncio
-from datetime import datetime, timezone
+import hashlib
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 
 import pytest
+from botocore.exceptions import ClientError
 from fastapi.testclient import TestClient
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import async_sessionmaker
+from PIL import Image
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
-from app.models import BodyComparison, BodyPhoto, User
+from app.core.config import Settings, get_settings
+from app.core.database import get_session
+from app.main import app
+from app.models import Base, BodyComparison, BodyPhoto, User
+from app.models.keypoints import KEYPOINT_NAMES, pack_keypoints
+from app.routers import body_progress as body_progress_router
+from app.services import ai_pose, derivatives
+from app.services.ai_pose import (
+    PoseEstimationError,
+    PoseEstimator,
+    PoseImageMissingError,
+    PoseWorkerPool,
+)
+from app.services.derivatives import BorderColorBackgroundRemover, DerivativePipeline
+from app.services.photo_index import PhotoKDTree, get_photo_index
+from app.services.storage import StorageService
+from app.services.body_compare import (
+    BodyComparisonService,
+    calculate_relative_metrics,
+    comparison_fingerprint,
+)
+
+
+KEYPOINTS_FROM = {
+    "neck": {"x": 0.5, "y": 0.2, "confidence": 0.95},
+    "mid_hip": {"x": 0.5, "y": 0.6, "confidence": 0.95},
+    "left_shoulder": {"x": 0.3, "y": 0.25, "confidence": 0.9},
+    "right_shoulder": {"x": 0.7, "y": 0.25, "confidence": 0.9},
+    "left_hip": {"x": 0.35, "y": 0.55, "confidence": 0.92},
+    "right_hip": {"x": 0.65, "y": 0.55, "confidence": 0.92},
+    "left_elbow": {"x": 0.25, "y": 0.4, "confidence": 0.88},
+    "right_elbow": {"x": 0.75, "y": 0.4, "confidence": 0.88},
+}
+KEYPOINTS_TO = {
+    "neck": {"x": 0.5, "y": 0.2, "confidence": 0.95},
+    "mid_hip": {"x": 0.5, "y": 0.6, "confidence": 0.95},
+    "left_shoulder": {"x": 0.32, "y": 0.24, "confidence": 0.9},
+    "right_shoulder": {"x": 0.68, "y": 0.24, "confidence": 0.9},
+    "left_hip": {"x": 0.36, "y": 0.55, "confidence": 0.92},
+    "right_hip": {"x": 0.64, "y": 0.55, "confidence": 0.92},
+    "left_elbow": {"x": 0.26, "y": 0.4, "confidence": 0.88},
+    "right_elbow": {"x": 0.74, "y": 0.4, "confidence": 0.88},
+}
 
 
 @pytest.mark.usefixtures("client")
@@ -40,6 +88,63 @@ def test_upload_creates_photo(client: TestClient, session_factory: async_session
     assert photo.file_url.startswith("https://cdn.example.com/")
 
 
+def test_client_keypoints_are_trusted_only_without_pose_model(monkeypatch):
+    monkeypatch.delenv("POSE_MODEL", raising=False)
+    assert Settings(_env_file=None).pose_trust_client_keypoints is True
+    assert Settings(_env_file=None, pose_model="pkg:Model").pose_trust_client_keypoints is False
+    assert Settings(
+        _env_file=None, pose_model="pkg:Model", pose_trust_client_keypoints=True
+    ).pose_trust_client_keypoints is True
+
+
+def test_upload_rejects_malformed_keypoints(client: TestClient, monkeypatch):
+    monkeypatch.setattr(get_settings(), "pose_trust_client_keypoints", True)
+    payload = {
+        "view": "front",
+        "file_name": "front.jpg",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+    for keypoints in ({"neck": {"y": 0.2}}, {"neck": [0.5, 0.2]}, {"neck": {"x": "left", "y": 0.2}}):
+        response = client.post("/api/body-progress/upload", json={**payload, "pose_keypoints": keypoints})
+        assert response.status_code == 422, keypoints
+        batch = client.post(
+            "/api/body-progress/upload/batch",
+            json={"items": [{**payload, "pose_keypoints": keypoints}]},
+        )
+        assert batch.status_code == 422, keypoints
+
+    accepted = client.post(
+        "/api/body-progress/upload",
+        json={**payload, "pose_keypoints": {"neck": {"x": 0.5, "y": 0.2}}},
+    )
+    assert accepted.status_code == 201
+
+
+def test_batch_upload_creates_all_photos(client: TestClient, session_factory: async_sessionmaker):
+    timestamp = datetime.now(timezone.utc).isoformat()
+    payload = {
+        "items": [
+            {"view": view, "file_name": f"{view}.jpg", "timestamp": timestamp}
+            for view in ("front", "side", "back")
+        ]
+    }
+
+    response = client.post("/api/body-progress/upload/batch", json=payload)
+    assert response.status_code == 201, response.text
+    items = response.json()["items"]
+    assert len(items) == 3
+    assert all(item["upload_url"].startswith("https://example.com/upload/") for item in items)
+
+    async def _fetch_views():
+        async with session_factory() as session:
+            photos = await session.scalars(
+                select(BodyPhoto).where(BodyPhoto.id.in_([item["photo_id"] for item in items]))
+            )
+            return sorted(photo.view for photo in photos)
+
+    assert asyncio.get_event_loop().run_until_complete(_fetch_views()) == ["back", "front", "side"]
+
+
 def test_analyze_body_progress_generates_comparison(
     client: TestClient, session_factory: async_sessionmaker, seed_user: User
 ):
@@ -103,3 +208,781 @@ def test_analyze_body_progress_generates_comparison(
     assert comparison is not None
     assert comparison.result["verdict"] == payload["verdict"]
     assert comparison.result["metrics"]["delta_shoulders_pct"] != 0
+
+
+def test_batch_engine_matches_pairwise_metrics():
+    partial = {name: point for name, point in KEYPOINTS_TO.items() if name != "left_elbow"}
+    history = [KEYPOINTS_FROM, KEYPOINTS_TO, partial]
+    pairs = [(0, 1), (1, 2), (2, 0), (0, 0)]
+    service = BodyComparisonService()
+
+    results = asyncio.get_event_loop().run_until_complete(
+        service.analyze_many(keypoints=history, pairs=pairs)
+    )
+
+    for (from_index, to_index), result in zip(pairs, results):
+        expected = calculate_relative_metrics(
+            from_photo=BodyPhoto(),
+            to_photo=BodyPhoto(),
+            from_keypoints=history[from_index],
+            to_keypoints=history[to_index],
+        )
+        assert result.delta_waist_pct == pytest.approx(expected.delta_waist_pct)
+        assert result.delta_shoulders_pct == pytest.approx(expected.delta_shoulders_pct)
+        assert result.delta_arm_pct == pytest.approx(expected.delta_arm_pct)
+        assert result.confidence == pytest.approx(expected.confidence)
+        assert result.posture_change_hint == expected.posture_change_hint
+        assert result.verdict == expected.verdict
+
+    matrix = asyncio.get_event_loop().run_until_complete(service.analyze_matrix(keypoints=history))
+    assert matrix.deltas_pct.shape == (3, 3, 4)
+    assert matrix.deltas_pct[0, 1, 0] == pytest.approx(results[0].delta_shoulders_pct)
+
+
+def test_timeline_reuses_stored_comparisons(
+    client: TestClient, session_factory: async_sessionmaker, seed_user: User
+):
+    async def _seed_history():
+        async with session_factory() as session:
+            photos = [
+                BodyPhoto(
+                    user_id=seed_user.id,
+                    view="front",
+                    file_url=f"https://cdn.example.com/{month}.jpg",
+                    taken_at=datetime(2023, month, 1, tzinfo=timezone.utc),
+                    pose_keypoints=KEYPOINTS_FROM if month % 2 else KEYPOINTS_TO,
+                )
+                for month in (1, 2, 3)
+            ]
+            session.add_all(photos)
+            await session.flush()
+            stored = BodyComparison(
+                user_id=seed_user.id,
+                from_photo_id=photos[0].id,
+                to_photo_id=photos[1].id,
+                result={
+                    "metrics": {
+                        "delta_waist_pct": 1.0,
+                        "delta_hip_pct": 1.0,
+                        "delta_shoulders_pct": 1.0,
+                        "delta_arm_pct": 1.0,
+                    },
+                    "confidence": 0.5,
+                    "verdict": "stored",
+                },
+                keypoints_hash=comparison_fingerprint(photos[0], photos[1]),
+            )
+            session.add(stored)
+            await session.commit()
+            return stored.id
+
+    stored_id = asyncio.get_event_loop().run_until_complete(_seed_history())
+
+    response = client.get("/api/body-progress/timeline", params={"view": "front"})
+    assert response.status_code == 200, response.text
+    items = response.json()["items"]
+    assert len(items) == 2
+    assert items[0]["comparison_id"] == stored_id
+    assert items[0]["verdict"] == "stored"
+    assert items[1]["metrics"]["delta_shoulders_pct"] != 0
+
+    again = client.get("/api/body-progress/timeline", params={"view": "front"})
+    assert [item["comparison_id"] for item in again.json()["items"]] == [
+        item["comparison_id"] for item in items
+    ]
+
+    async def _count_comparisons():
+        async with session_factory() as session:
+            return len((await session.scalars(select(BodyComparison))).all())
+
+    assert asyncio.get_event_loop().run_until_complete(_count_comparisons()) == 2
+
+
+def test_analyze_reuses_cached_result_until_keypoints_change(
+    client: TestClient, session_factory: async_sessionmaker, seed_user: User
+):
+    async def _seed_photos():
+        async with session_factory() as session:
+            photo_from = BodyPhoto(
+                user_id=seed_user.id,
+                view="side",
+                file_url="https://cdn.example.com/from.jpg",
+                taken_at=datetime(2023, 1, 1, tzinfo=timezone.utc),
+                pose_keypoints=KEYPOINTS_FROM,
+            )
+            photo_to = BodyPhoto(
+                user_id=seed_user.id,
+                view="side",
+                file_url="https://cdn.example.com/to.jpg",
+                taken_at=datetime(2023, 2, 1, tzinfo=timezone.utc),
+                pose_keypoints=KEYPOINTS_FROM,
+            )
+            session.add_all([photo_from, photo_to])
+            await session.commit()
+            return photo_from.id, photo_to.id
+
+    from_id, to_id = asyncio.get_event_loop().run_until_complete(_seed_photos())
+    pair = {"from_id": from_id, "to_id": to_id}
+
+    first = client.post("/api/body-progress/analyze", json=pair).json()
+    second = client.post("/api/body-progress/analyze", json=pair).json()
+    assert second == first
+    assert first["metrics"]["delta_shoulders_pct"] == 0
+
+    async def _update_keypoints():
+        async with session_factory() as session:
+            photo = await session.get(BodyPhoto, to_id)
+            photo.pose_keypoints = KEYPOINTS_TO
+            await session.commit()
+
+    asyncio.get_event_loop().run_until_complete(_update_keypoints())
+
+    third = client.post("/api/body-progress/analyze", json=pair).json()
+    assert third["comparison_id"] == first["comparison_id"]
+    assert third["metrics"]["delta_shoulders_pct"] != 0
+
+    async def _count_comparisons():
+        async with session_factory() as session:
+            return len((await session.scalars(select(BodyComparison))).all())
+
+    assert asyncio.get_event_loop().run_until_complete(_count_comparisons()) == 1
+
+
+def test_pose_keypoints_are_packed_with_dict_accessor():
+    photo = BodyPhoto(pose_keypoints={**KEYPOINTS_FROM, "unknown": {"x": 1.0, "y": 1.0}})
+
+    assert len(photo.pose_keypoints_packed) == len(KEYPOINT_NAMES) * 3 * 4
+    array = photo.keypoints_array
+    assert array.shape == (len(KEYPOINT_NAMES), 3)
+    assert not array.flags.writeable
+
+    restored = photo.pose_keypoints
+    assert set(restored) == set(KEYPOINTS_FROM)
+    for name, point in KEYPOINTS_FROM.items():
+        assert restored[name] == pytest.approx(point)
+    assert photo.keypoints_hash is not None
+
+
+def test_stored_pose_features_match_keypoint_engine():
+    partial = {name: point for name, point in KEYPOINTS_TO.items() if name != "left_elbow"}
+    photos = [BodyPhoto(pose_keypoints=keypoints) for keypoints in (KEYPOINTS_FROM, KEYPOINTS_TO, partial)]
+    pairs = [(0, 1), (1, 2), (2, 0)]
+    service = BodyComparisonService()
+
+    stored = asyncio.get_event_loop().run_until_complete(
+        service.analyze_photos(photos=photos, pairs=pairs)
+    )
+    computed = asyncio.get_event_loop().run_until_complete(
+        service.analyze_many(keypoints=[photo.keypoints_array for photo in photos], pairs=pairs)
+    )
+    for left, right in zip(stored, computed):
+        assert left.delta_waist_pct == pytest.approx(right.delta_waist_pct)
+        assert left.delta_shoulders_pct == pytest.approx(right.delta_shoulders_pct)
+        assert left.delta_arm_pct == pytest.approx(right.delta_arm_pct)
+        assert left.confidence == pytest.approx(right.confidence)
+        assert left.verdict == right.verdict
+
+    assert photos[2].arm_confidence == pytest.approx(0.88)
+    assert photos[2].pose_confidence == pytest.approx(0.88)
+    photos[2].pose_keypoints = None
+    assert photos[2].shoulders_ratio is None and photos[2].pose_confidence is None
+
+
+def test_list_body_photos_pages_with_cursor(
+    client: TestClient, session_factory: async_sessionmaker, seed_user: User
+):
+    async def _seed_photos():
+        async with session_factory() as session:
+            session.add_all(
+                BodyPhoto(
+                    user_id=seed_user.id,
+                    view="back",
+                    file_url=f"https://cdn.example.com/{day}.jpg",
+                    taken_at=datetime(2023, 3, day, tzinfo=timezone.utc),
+                )
+                for day in range(1, 6)
+            )
+            await session.commit()
+
+    asyncio.get_event_loop().run_until_complete(_seed_photos())
+
+    seen: list[str] = []
+    cursor = None
+    for _ in range(3):
+        params = {"view": "back", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/body-progress/list", params=params)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        seen.extend(item["file_url"] for item in page["items"])
+        cursor = page["next_cursor"]
+
+    assert cursor is None
+    assert seen == [f"https://cdn.example.com/{day}.jpg" for day in range(5, 0, -1)]
+    assert page["items"][0]["download_url"] == "https://example.com/download/1.jpg"
+    assert client.get("/api/body-progress/list", params={"cursor": "nope"}).status_code == 400
+
+
+def test_pose_estimator_writes_back_server_keypoints(monkeypatch):
+    monkeypatch.setattr(StorageService, "download_object", lambda self, key: key.encode())
+    pool = PoseWorkerPool(
+        model_path="app.services.ai_pose:StandInPoseModel",
+        max_workers=1,
+        max_batch_size=4,
+        max_wait_ms=50,
+    )
+    photos = [
+        BodyPhoto(file_url=f"https://cdn.example.com/users/u/body/{name}.jpg")
+        for name in ("a", "b", "c", "a")
+    ]
+    try:
+        asyncio.get_event_loop().run_until_complete(
+            PoseEstimator(pool, StorageService()).ensure_keypoints(photos)
+        )
+    finally:
+        pool.close()
+
+    assert all(photo.pose_keypoints_packed is not None for photo in photos)
+    assert photos[0].pose_keypoints == photos[3].pose_keypoints
+    assert photos[0].pose_keypoints != photos[1].pose_keypoints
+    assert set(photos[1].pose_keypoints) == set(KEYPOINT_NAMES)
+
+
+def test_pose_pool_close_fails_in_flight_batches(monkeypatch):
+    monkeypatch.setattr(ai_pose, "_predict_batch", lambda images: time.sleep(0.5) or images)
+    pool = PoseWorkerPool(
+        model_path="app.services.ai_pose:StandInPoseModel",
+        max_workers=1,
+        max_batch_size=1,
+        max_wait_ms=0,
+    )
+    pool._executor.shutdown()
+    pool._executor = ThreadPoolExecutor(max_workers=1)
+
+    async def estimate_then_close():
+        estimate = asyncio.ensure_future(pool.estimate(b"image"))
+        while not pool._dispatches:
+            await asyncio.sleep(0.01)
+        pool.close()
+        with pytest.raises(PoseEstimationError):
+            await estimate
+        await asyncio.sleep(0)
+        assert not pool._dispatches
+
+    asyncio.get_event_loop().run_until_complete(estimate_then_close())
+
+
+def test_kd_tree_reinsert_moves_point_without_rebuild():
+    taken_at = datetime(2023, 5, 1, tzinfo=timezone.utc)
+    tree = PhotoKDTree.build(
+        [(f"p{index}", taken_at, (float(index),) * 5) for index in range(8)]
+    )
+    root = tree._root
+
+    tree.insert("p3", taken_at, (20.0,) * 5)
+    assert tree._root is root
+    assert len(tree) == 8
+    assert tree.nearest((3.1,) * 5).photo_id in {"p2", "p4"}
+    assert tree.nearest((19.0,) * 5).photo_id == "p3"
+
+    tree.remove("p7")
+    assert "p7" not in tree
+    assert tree.nearest((7.0,) * 5).photo_id == "p6"
+
+
+def test_failed_estimation_waits_for_retry_after(monkeypatch):
+    downloads = []
+
+    def failing_download(self, key):
+        downloads.append(key)
+        raise OSError("object missing")
+
+    monkeypatch.setattr(StorageService, "download_object", failing_download)
+    photo = BodyPhoto(file_url="https://cdn.example.com/users/u/body/a.jpg")
+    estimator = PoseEstimator(object(), StorageService())
+    run = asyncio.get_event_loop().run_until_complete
+
+    for _ in range(3):
+        with pytest.raises(PoseEstimationError):
+            run(estimator.ensure_keypoints([photo]))
+    assert len(downloads) == 1
+    assert photo.pose_retry_after > datetime.now(timezone.utc)
+
+    photo.pose_retry_after = datetime.now(timezone.utc) - timedelta(seconds=1)
+    with pytest.raises(PoseEstimationError):
+        run(estimator.ensure_keypoints([photo]))
+    assert len(downloads) == 2
+
+    photo.pose_keypoints = KEYPOINTS_FROM
+    assert photo.pose_retry_after is None
+
+
+def test_missing_upload_is_retried_without_backoff(monkeypatch):
+    downloads = []
+
+    def not_uploaded(self, key):
+        downloads.append(key)
+        raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+
+    monkeypatch.setattr(StorageService, "download_object", not_uploaded)
+    photo = BodyPhoto(file_url="https://cdn.example.com/users/u/body/a.jpg")
+    estimator = PoseEstimator(object(), StorageService())
+    for _ in range(2):
+        with pytest.raises(PoseImageMissingError):
+            asyncio.get_event_loop().run_until_complete(estimator.ensure_keypoints([photo]))
+    assert len(downloads) == 2
+    assert photo.pose_retry_after is None
+
+
+def test_timeline_does_not_estimate_keypoints(
+    client: TestClient, session_factory: async_sessionmaker, seed_user: User, monkeypatch
+):
+    downloads = []
+    monkeypatch.setattr(
+        StorageService, "download_object", lambda self, key: downloads.append(key) or b""
+    )
+
+    async def _seed():
+        async with session_factory() as session:
+            photos = [
+                BodyPhoto(
+                    user_id=seed_user.id,
+                    view="front",
+                    file_url=f"https://cdn.example.com/pending-{month}.jpg",
+                    taken_at=datetime(2023, month, 1, tzinfo=timezone.utc),
+                    pose_keypoints=keypoints,
+                )
+                for month, keypoints in ((1, KEYPOINTS_FROM), (2, None), (3, KEYPOINTS_TO))
+            ]
+            session.add_all(photos)
+            await session.commit()
+            return [photo.id for photo in photos]
+
+    first, _, third = asyncio.get_event_loop().run_until_complete(_seed())
+    items = client.get("/api/body-progress/timeline").json()["items"]
+    assert [(item["from_id"], item["to_id"]) for item in items] == [(first, third)]
+    assert downloads == []
+
+
+def test_derivative_processing_estimates_keypoints(
+    session_factory: async_sessionmaker, seed_user: User, monkeypatch
+):
+    class PackingPool:
+        async def estimate(self, image: bytes) -> bytes:
+            return pack_keypoints(KEYPOINTS_FROM)
+
+    monkeypatch.setattr(derivatives, "get_pose_pool", lambda: PackingPool())
+    image = io.BytesIO()
+    Image.new("RGB", (60, 120), "white").save(image, format="JPEG")
+    store = InMemoryObjectStore()
+    store.objects["users/u/body/new.jpg"] = image.getvalue()
+
+    async def _run():
+        async with session_factory() as session:
+            photo = BodyPhoto(
+                user_id=seed_user.id,
+                view="front",
+                file_url="https://cdn.example.com/users/u/body/new.jpg",
+                taken_at=datetime(2023, 1, 1, tzinfo=timezone.utc),
+            )
+            session.add(photo)
+            await session.commit()
+        await derivatives.process_photo_derivatives(session_factory, store, seed_user.id, [photo.id])
+        async with session_factory() as session:
+            return await session.get(BodyPhoto, photo.id)
+
+    stored = asyncio.get_event_loop().run_until_complete(_run())
+    assert stored.pose_keypoints_packed == pack_keypoints(KEYPOINTS_FROM)
+    assert stored.compare_key is not None
+
+
+def test_estimation_requires_configured_model():
+    photo = BodyPhoto(file_url="https://cdn.example.com/users/u/body/a.jpg")
+    with pytest.raises(PoseEstimationError, match="No pose model"):
+        asyncio.get_event_loop().run_until_complete(
+            PoseEstimator(None, StorageService()).ensure_keypoints([photo])
+        )
+    assert photo.pose_retry_after is None
+
+
+class InMemoryObjectStore:
+    """Minimal S3 stand-in for the derivative pipeline."""
+
+    def __init__(self) -> None:
+        self.objects: dict[str, bytes] = {}
+        self.puts = 0
+
+    def object_key_from_url(self, url: str) -> str:
+        return url.removeprefix("https://cdn.example.com/")
+
+    def object_etag(self, key: str) -> str | None:
+        data = self.objects.get(key)
+        return hashlib.md5(data).hexdigest() if data is not None else None
+
+    def object_exists(self, key: str) -> bool:
+        return key in self.objects
+
+    def download_object(self, key: str) -> bytes:
+        return self.objects[key]
+
+    def upload_object(self, key: str, data: bytes, content_type: str) -> None:
+        self.objects[key] = data
+        self.puts += 1
+
+
+def test_derivative_pipeline_skips_existing_outputs():
+    image = Image.new("RGB", (600, 1200), "white")
+    image.paste((40, 80, 160), (200, 200, 400, 1100))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG")
+    store = InMemoryObjectStore()
+    store.objects["users/u/body/front.jpg"] = buffer.getvalue()
+
+    url = "https://cdn.example.com/users/u/body/front.jpg"
+    photo = BodyPhoto(user_id="u", file_url=url, pose_keypoints=KEYPOINTS_FROM)
+    pipeline = DerivativePipeline(store, remover=BorderColorBackgroundRemover())
+    keys = asyncio.get_event_loop().run_until_complete(pipeline.process(photo))
+
+    assert store.puts == 3
+    assert photo.content_sha256 == hashlib.sha256(buffer.getvalue()).hexdigest()
+    assert photo.thumbnail_key == keys["thumbnail"]
+    prefix = f"users/u/derivatives/v1/{photo.content_sha256}/"
+    assert all(key.startswith(prefix) for key in keys.values())
+    assert max(Image.open(io.BytesIO(store.objects[keys["thumbnail"]])).size) <= 256
+    segmentation = Image.open(io.BytesIO(store.objects[photo.segmentation_key]))
+    assert segmentation.mode == "RGBA"
+    assert segmentation.getpixel((0, 0))[3] == 0
+    assert segmentation.getpixel((300, 600))[3] == 255
+
+    duplicate = BodyPhoto(user_id="u", file_url=url, pose_keypoints=KEYPOINTS_FROM)
+    asyncio.get_event_loop().run_until_complete(pipeline.process(duplicate))
+    assert store.puts == 3
+    assert duplicate.compare_key == photo.compare_key
+
+    # Without a configured remover only thumbnail and compare variants are produced.
+    bare_store = InMemoryObjectStore()
+    bare_store.objects.update(store.objects)
+    bare = BodyPhoto(user_id="u", file_url=url, pose_keypoints=KEYPOINTS_TO)
+    asyncio.get_event_loop().run_until_complete(DerivativePipeline(bare_store).process(bare))
+    assert bare_store.puts == 1
+    assert bare.segmentation_key is None
+
+
+def test_comparison_history_loads_photos_in_one_query(
+    client: TestClient, session_factory: async_sessionmaker, seed_user: User, test_engine
+):
+    async def _seed_history():
+        async with session_factory() as session:
+            photos = [
+                BodyPhoto(
+                    user_id=seed_user.id,
+                    view="front",
+                    file_url=f"https://cdn.example.com/history-{month}.jpg",
+                    taken_at=datetime(2023, month, 1, tzinfo=timezone.utc),
+                )
+                for month in (1, 2, 3)
+            ]
+            session.add_all(photos)
+            await session.flush()
+            session.add_all(
+                BodyComparison(
+                    user_id=seed_user.id,
+                    from_photo_id=photos[start].id,
+                    to_photo_id=photos[end].id,
+                    result={},
+                    created_at=datetime(2023, 4, day, tzinfo=timezone.utc),
+                )
+                for day, (start, end) in enumerate([(0, 1), (1, 2), (0, 2)], start=1)
+            )
+            await session.commit()
+
+    asyncio.get_event_loop().run_until_complete(_seed_history())
+
+    statements: list[str] = []
+    event.listen(
+        test_engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+
+    first = client.get("/api/body-progress/comparisons", params={"limit": 2}).json()
+    assert len(statements) == 1
+    assert [item["from_photo_url"] for item in first["items"]] == [
+        "https://example.com/download/history-1.jpg",
+        "https://example.com/download/history-2.jpg",
+    ]
+    assert first["items"][0]["to_photo_url"] == "https://example.com/download/history-3.jpg"
+
+    second = client.get(
+        "/api/body-progress/comparisons", params={"limit": 2, "cursor": first["next_cursor"]}
+    ).json()
+    assert len(second["items"]) == 1
+    assert second["next_cursor"] is None
+
+
+def test_best_match_uses_incrementally_updated_index(
+    client: TestClient, session_factory: async_sessionmaker, seed_user: User, monkeypatch
+):
+    get_photo_index().clear()
+    monkeypatch.setattr(get_settings(), "pose_trust_client_keypoints", True)
+
+    async def _seed():
+        async with session_factory() as session:
+            photos = [
+                BodyPhoto(
+                    user_id=seed_user.id,
+                    view="front",
+                    file_url=f"https://cdn.example.com/{day}.jpg",
+                    taken_at=datetime(2023, 5, day, tzinfo=timezone.utc),
+                    distance_cm=distance,
+                    camera_height_cm=120,
+                    pose_keypoints=keypoints,
+                )
+                for day, distance, keypoints in (
+                    (1, 300, KEYPOINTS_FROM),
+                    (2, 200, KEYPOINTS_TO),
+                    (3, 210, KEYPOINTS_TO),
+                    (9, 200, KEYPOINTS_TO),
+                )
+            ]
+            session.add_all(photos)
+            await session.commit()
+            return [photo.id for photo in photos]
+
+    first, second, target, later = asyncio.get_event_loop().run_until_complete(_seed())
+
+    response = client.get(f"/api/body-progress/best-match/{target}")
+    assert response.status_code == 200, response.text
+    # The later photo is an exact match but only earlier photos qualify.
+    assert response.json()["match"]["id"] == second
+
+    uploaded = client.post(
+        "/api/body-progress/upload",
+        json={
+            "view": "front",
+            "file_name": "front.jpg",
+            "timestamp": datetime(2023, 5, 2, 12, tzinfo=timezone.utc).isoformat(),
+            "distance_cm": 210,
+            "camera_height_cm": 120,
+            "pose_keypoints": KEYPOINTS_TO,
+        },
+    ).json()["photo_id"]
+
+    async def _index_from_database():
+        async with session_factory() as session:
+            return await get_photo_index().get(session, seed_user.id, "front")
+
+    # Folded into the cached tree without a reload...
+    assert uploaded in asyncio.get_event_loop().run_until_complete(_index_from_database())
+    # ...and found again when the tree is rebuilt from the database.
+    get_photo_index().clear()
+    reloaded = asyncio.get_event_loop().run_until_complete(_index_from_database())
+    assert len(reloaded) == 5 and uploaded in reloaded
+
+    response = client.get(f"/api/body-progress/best-match/{target}")
+    assert response.json()["match"]["id"] == uploaded
+    assert response.json()["distance"] == pytest.approx(0.0)
+    assert client.get(f"/api/body-progress/best-match/{first}").status_code == 404
+
+
+def test_trends_aggregate_typed_metric_columns(
+    client: TestClient, session_factory: async_sessionmaker, seed_user: User
+):
+    start = datetime.now(timezone.utc) - timedelta(days=30)
+
+    async def _seed():
+        async with session_factory() as session:
+            photos = [
+                BodyPhoto(
+                    user_id=seed_user.id,
+                    view="front",
+                    file_url=f"https://cdn.example.com/{day}.jpg",
+                    taken_at=start + timedelta(days=day),
+                )
+                for day in (0, 1, 2, 10)
+            ]
+            session.add_all(photos)
+            await session.flush()
+            for index, (previous, current) in enumerate(zip(photos, photos[1:])):
+                waist = [1.0, 2.0, 10.0][index]
+                session.add(
+                    BodyComparison(
+                        user_id=seed_user.id,
+                        from_photo_id=previous.id,
+                        to_photo_id=current.id,
+                        result={
+                            "metrics": {
+                                "delta_waist_pct": waist,
+                                "delta_hip_pct": 0.0,
+                                "delta_shoulders_pct": -waist,
+                                # Missing for one comparison; must not drag the mean down.
+                                "delta_arm_pct": [4.0, None, 4.0][index],
+                            },
+                            "confidence": 0.8,
+                            "verdict": "",
+                        },
+                    )
+                )
+            await session.commit()
+
+    asyncio.get_event_loop().run_until_complete(_seed())
+
+    async def _typed_columns():
+        async with session_factory() as session:
+            return (await session.execute(
+                select(BodyComparison.delta_waist_pct, BodyComparison.confidence)
+            )).all()
+
+    assert sorted(asyncio.get_event_loop().run_until_complete(_typed_columns())) == [
+        (1.0, 0.8), (2.0, 0.8), (10.0, 0.8)
+    ]
+
+    response = client.get("/api/body-progress/trends", params={"window_days": 7, "days": 60})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert [window["count"] for window in data["windows"]] == [2, 1]
+    assert data["windows"][0]["delta_waist_pct"] == pytest.approx(1.5)
+    assert data["windows"][0]["delta_arm_pct"] == pytest.approx(4.0)
+    assert data["windows"][1]["confidence"] == pytest.approx(0.8)
+    # Points (day 1, 1), (day 2, 2), (day 10, 10) lie on y = x.
+    assert data["slopes"]["delta_waist_pct"] == pytest.approx(1.0, rel=1e-3)
+    assert data["slopes"]["delta_shoulders_pct"] == pytest.approx(-1.0, rel=1e-3)
+    assert data["slopes"]["delta_hip_pct"] == pytest.approx(0.0, abs=1e-9)
+    assert data["slopes"]["delta_arm_pct"] == pytest.approx(0.0, abs=1e-9)
+
+
+def test_batch_analyze_refreshes_pairs_in_one_flush(
+    client: TestClient, session_factory: async_sessionmaker, seed_user: User, test_engine
+):
+    async def _seed():
+        async with session_factory() as session:
+            photos = [
+                BodyPhoto(
+                    user_id=seed_user.id,
+                    view="front",
+                    file_url=f"https://cdn.example.com/batch-{month}.jpg",
+                    taken_at=datetime(2023, month, 1, tzinfo=timezone.utc),
+                    pose_keypoints=KEYPOINTS_FROM if month % 2 else KEYPOINTS_TO,
+                )
+                for month in (1, 2, 3)
+            ]
+            session.add_all(photos)
+            await session.flush()
+            session.add(
+                BodyComparison(
+                    user_id=seed_user.id,
+                    from_photo_id=photos[0].id,
+                    to_photo_id=photos[1].id,
+                    result={"metrics": {}, "confidence": 0.0, "verdict": "stale"},
+                    keypoints_hash="outdated",
+                )
+            )
+            await session.commit()
+            return [photo.id for photo in photos]
+
+    first, second, third = asyncio.get_event_loop().run_until_complete(_seed())
+
+    statements: list[str] = []
+    event.listen(
+        test_engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+
+    pairs = [(first, second), (second, third), (first, third), (first, second)]
+    response = client.post(
+        "/api/body-progress/analyze/batch",
+        json={"pairs": [{"from_id": a, "to_id": b} for a, b in pairs]},
+    )
+    assert response.status_code == 200, response.text
+    items = response.json()["items"]
+    assert len(items) == 4
+    assert items[0] == items[3]
+    assert items[0]["verdict"] != "stale"
+    assert sum(statement.startswith("INSERT") for statement in statements) == 1
+    assert sum(statement.startswith("UPDATE") for statement in statements) == 1
+
+    missing = client.post(
+        "/api/body-progress/analyze/batch",
+        json={"pairs": [{"from_id": first, "to_id": "missing"}]},
+    )
+    assert missing.status_code == 404
+
+
+@pytest.mark.parametrize("endpoint", ["batch", "timeline"])
+def test_comparison_writes_recover_from_partial_conflict(
+    client: TestClient, seed_user: User, tmp_path, monkeypatch, endpoint
+):
+    # A file database, so the racing writer commits on its own connection.
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'race.db'}")
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    run = asyncio.get_event_loop().run_until_complete
+
+    async def _seed():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with factory() as session:
+            photos = [
+                BodyPhoto(
+                    user_id=seed_user.id,
+                    view="front",
+                    file_url=f"https://cdn.example.com/race-{month}.jpg",
+                    taken_at=datetime(2023, month, 1, tzinfo=timezone.utc),
+                    pose_keypoints=KEYPOINTS_FROM if month % 2 else KEYPOINTS_TO,
+                )
+                for month in (1, 2, 3)
+            ]
+            session.add_all(photos)
+            await session.commit()
+            return [photo.id for photo in photos]
+
+    first, second, third = run(_seed())
+
+    async def _get_session():
+        async with factory() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = _get_session
+
+    refresh = body_progress_router._refresh_comparisons
+    raced = []
+
+    async def racing_refresh(session, user, service, comparisons, pairs):
+        if not raced:
+            raced.append(True)
+            # Another request stores only the first pair between our read and our commit.
+            async with factory() as other:
+                photos = {photo.id: photo for photo in (await other.scalars(select(BodyPhoto))).all()}
+                await refresh(other, user, service, {}, [(photos[first], photos[second])])
+                await other.commit()
+        await refresh(session, user, service, comparisons, pairs)
+
+    monkeypatch.setattr(body_progress_router, "_refresh_comparisons", racing_refresh)
+
+    async def _stored_pairs():
+        async with factory() as session:
+            return sorted(
+                (row.from_photo_id, row.to_photo_id)
+                for row in (await session.scalars(select(BodyComparison))).all()
+            )
+
+    try:
+        if endpoint == "batch":
+            response = client.post(
+                "/api/body-progress/analyze/batch",
+                json={
+                    "pairs": [
+                        {"from_id": first, "to_id": second},
+                        {"from_id": second, "to_id": third},
+                    ]
+                },
+            )
+        else:
+            response = client.get("/api/body-progress/timeline")
+        assert response.status_code == 200, response.text
+        assert len(response.json()["items"]) == 2
+        assert raced
+        assert run(_stored_pairs()) == sorted([(first, second), (second, third)])
+    finally:
+        run(engine.dispose())
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+from prometheus_client import REGISTRY
+from redis.exceptions import RedisError
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core import database
+from app.core.auth_cache import TokenCache, UserCache
+from app.core.database import RecentWriters, _instrumented_pool_class, _track_pool
+from app.core.deps import get_current_user, get_read_session
+from app.core.security import create_token
+from app.models import User
+
+
+def test_instrumented_pool_records_checkout_wait(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=_instrumented_pool_class("test"),
+        pool_size=1,
+        max_overflow=0,
+    )
+    _track_pool(engine, "test")
+    # Opening the connection is slow; that must not show up as waiting for the pool.
+    event.listen(engine.sync_engine, "do_connect", lambda *args: time.sleep(0.2))
+
+    def _sample(name: str) -> float:
+        return REGISTRY.get_sample_value(name, {"pool": "test"}) or 0.0
+
+    during: list[float] = []
+
+    async def _query_twice() -> None:
+        for _ in range(2):
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+                during.append(
+                    (_sample("h_life_db_pool_checked_out"), _sample("h_life_db_pool_overflow"))
+                )
+        await engine.dispose()
+
+    before = _sample("h_life_db_pool_checkout_wait_seconds_count")
+    waited = _sample("h_life_db_pool_checkout_wait_seconds_sum")
+    checked_out = _sample("h_life_db_pool_checked_out")
+    assert _sample("h_life_db_pool_size") == 1
+    assert _sample("h_life_db_pool_overflow") == -1
+    asyncio.get_event_loop().run_until_complete(_query_twice())
+    assert _sample("h_life_db_pool_checkout_wait_seconds_count") - before == 2
+    assert _sample("h_life_db_pool_checkout_wait_seconds_sum") - waited < 0.1
+    # The single pooled connection is open, so the pool is full but not overflowing.
+    assert during == [(checked_out + 1, 0), (checked_out + 1, 0)]
+    assert _sample("h_life_db_pool_checked_out") == checked_out
+
+
+def test_pool_overflow_gauge_drops_when_surplus_connections_close(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'overflow.db'}",
+        poolclass=_instrumented_pool_class("overflow"),
+        pool_size=1,
+        max_overflow=1,
+    )
+    _track_pool(engine, "overflow")
+
+    def _overflow() -> float:
+        return REGISTRY.get_sample_value("h_life_db_pool_overflow", {"pool": "overflow"})
+
+    async def _burst() -> list[float]:
+        seen = []
+        async with engine.connect() as first, engine.connect() as second:
+            await first.execute(text("SELECT 1"))
+            await second.execute(text("SELECT 1"))
+            seen.append(_overflow())
+        await asyncio.sleep(0)
+        seen.append(_overflow())
+        await engine.dispose()
+        await asyncio.sleep(0)
+        seen.append(_overflow())
+        return seen
+
+    assert asyncio.get_event_loop().run_until_complete(_burst()) == [1, 0, -1]
+
+
+def test_read_session_uses_primary_within_write_window(
+    monkeypatch, session_factory: async_sessionmaker, seed_user: User, test_engine
+):
+    replica_engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    replica = async_sessionmaker(replica_engine, class_=AsyncSession)
+    monkeypatch.setattr(database, "AsyncSessionLocal", session_factory)
+    monkeypatch.setattr(database, "AsyncReadSessionLocal", replica)
+    monkeypatch.setattr(database, "recent_writers", RecentWriters(window_seconds=60))
+
+    async def _read_bind(user: User):
+        sessions = get_read_session(user)
+        session = await sessions.__anext__()
+        await sessions.aclose()
+        return session.bind
+
+    async def _write(user: User) -> None:
+        sessions = database.get_session()
+        session = await sessions.__anext__()
+        # Any token for the user marks the same writer.
+        await get_current_user(
+            create_token(user.id), session, TokenCache(max_entries=1), UserCache(60, 1)
+        )
+        session.add(User(email="new@example.com", hashed_password="hashed"))
+        await session.commit()
+        await sessions.aclose()
+
+    loop = asyncio.get_event_loop()
+    assert loop.run_until_complete(_read_bind(seed_user)) is replica_engine
+    loop.run_until_complete(_write(seed_user))
+    assert loop.run_until_complete(_read_bind(seed_user)) is test_engine
+    assert loop.run_until_complete(_read_bind(User(id="reader"))) is replica_engine
+    loop.run_until_complete(replica_engine.dispose())
+
+
+def test_shared_writer_marks_are_tracked_and_failures_logged(caplog):
+    marked: list[tuple[str, int]] = []
+
+    class FlakyRedis:
+        async def set(self, key: str, value: str, px: int) -> bool:
+            marked.append((key, px))
+            if len(marked) > 1:
+                raise RedisError("connection reset")
+            return True
+
+        async def exists(self, key: str) -> int:
+            return int(any(stored == key for stored, _ in marked))
+
+    writers = RecentWriters(window_seconds=5, redis=FlakyRedis())
+
+    async def _mark(key: str) -> None:
+        writers.mark(key)
+        await asyncio.sleep(0)
+
+    loop = asyncio.get_event_loop()
+    with caplog.at_level(logging.WARNING, logger="app.core.redis"):
+        loop.run_until_complete(_mark("first"))
+        assert marked == [("rw:first", 5000)]
+        assert "failed" not in caplog.text
+        loop.run_until_complete(_mark("second"))
+    assert "read-your-writes mark failed: connection reset" in caplog.text
+    # The local mark still holds for this worker.
+    assert loop.run_until_complete(writers.is_recent("second"))
@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+import asyncio
 from datetime import date
 
+from fakeredis.aioredis import FakeRedis
 from fastapi.testclient import TestClient
 
+from app.services.hydration import InMemoryHydrationStore, RedisHydrationStore
+
+DAY = 86400
+
 
 def test_hydration_flow(client: TestClient) -> None:
     goal = client.post("/api/hydration/goal", json={"daily_ml": 2500})
@@ -20,3 +26,58 @@ def test_hydration_flow(client: TestClient) -> None:
     summary = client.get("/api/hydration/summary")
     assert summary.status_code == 200
     assert summary.json()["goal_ml"] == 2500
+
+
+def test_in_memory_store_expires_by_last_write() -> None:
+    now = [0.0]
+    store = InMemoryHydrationStore(retention_days=7, clock=lambda: now[0])
+    today, old = date(2024, 6, 30), date(2024, 5, 1)
+
+    async def _scenario() -> None:
+        await store.set_goal("user", 1000)
+        assert await store.add("user", today, 600) == (600, 1000, 0)
+        assert await store.add("user", today, 500) == (1100, 1000, 1)
+        assert await store.add("user", today, 100) == (1200, 1000, 2)
+        assert await store.snapshot("user", today) == (1200, 1000, 2)
+        assert await store.snapshot("other", today) == (0, 2000, 0)
+
+        # A back-dated day is kept like any other key, and each write renews it.
+        assert await store.add("user", old, 200) == (200, 1000, 0)
+        now[0] = 6 * DAY
+        assert await store.add("user", old, 100) == (300, 1000, 0)
+
+        now[0] = 12 * DAY
+        assert await store.snapshot("user", today) == (0, 1000, 0)
+        assert await store.snapshot("user", old) == (300, 1000, 0)
+        now[0] = 13 * DAY
+        assert await store.snapshot("user", old) == (0, 1000, 0)
+
+    asyncio.get_event_loop().run_until_complete(_scenario())
+
+
+def test_redis_store_counts_atomically_with_retention() -> None:
+    day = date(2024, 6, 30)
+    retention = 7 * DAY
+
+    async def _scenario() -> None:
+        redis = FakeRedis(decode_responses=True)
+        store = RedisHydrationStore(redis, retention_days=7)
+        await store.set_goal("user", 1000)
+
+        assert await store.add("user", day, 600) == (600, 1000, 0)
+        assert await store.add("user", day, 500) == (1100, 1000, 1)
+        assert await store.add("user", day, 100) == (1200, 1000, 2)
+        assert await redis.get("hydration:user:day:2024-06-30") == "1200"
+        assert retention - 5 <= await redis.ttl("hydration:user:day:2024-06-30") <= retention
+        assert retention - 5 <= await redis.ttl("hydration:user:streak") <= retention
+        assert await redis.ttl("hydration:user:goal") == -1
+        assert await store.snapshot("user", day) == (1200, 1000, 2)
+
+        # Falling short on any day resets the streak.
+        assert await store.add("user", date(2024, 5, 1), 100) == (100, 1000, 0)
+        assert await redis.get("hydration:user:streak") == "0"
+        assert await store.snapshot("user", day) == (1200, 1000, 0)
+        assert await store.snapshot("other", day) == (0, 2000, 0)
+        await redis.aclose()
+
+    asyncio.get_event_loop().run_until_complete(_scenario())
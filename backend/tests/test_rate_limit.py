@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from app.core.config import get_settings
+from app.core.rate_limit import InMemoryRateLimiter, get_rate_limiter
+from app.core.redis import get_redis
+
+
+def test_gcra_allows_burst_then_spaces_requests():
+    limiter = InMemoryRateLimiter(max_requests=3, window_seconds=30)
+
+    assert [limiter.acquire("user", now=100.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire("user", now=100.0) == 10.0
+    assert limiter.acquire("other", now=100.0) == 0.0
+    assert limiter.acquire("user", now=110.0) == 0.0
+    assert limiter.acquire("user", now=110.0) > 0
+
+
+def test_sweep_evicts_only_idle_keys():
+    limiter = InMemoryRateLimiter(max_requests=2, window_seconds=10, shards=4)
+    for user in range(100):
+        limiter.acquire(f"user-{user}", now=0.0)
+    limiter.acquire("busy", now=0.0)
+    limiter.acquire("busy", now=0.0)
+
+    assert len(limiter) == 101
+    assert limiter.sweep(now=5.0) == 100
+    assert len(limiter) == 1
+    assert limiter.acquire("busy", now=5.0) == 0.0
+    assert limiter.acquire("busy", now=5.0) > 0
+
+
+def test_limits_are_enforced_across_requests(client: TestClient):
+    assert get_rate_limiter() is get_rate_limiter()
+    allowed = get_settings().rate_limit_max_requests
+
+    statuses = [
+        client.post(
+            "/api/plan/training/video-analysis",
+            json={"video_url": "https://example.com/squat.mp4", "exercise": "Agachamento"},
+        ).status_code
+        for _ in range(allowed + 1)
+    ]
+    assert statuses == [200] * allowed + [429]
+
+
+def test_redis_client_uses_short_socket_timeouts(monkeypatch):
+    monkeypatch.setattr(get_settings(), "redis_url", "redis://localhost:6379/0")
+    get_redis.cache_clear()
+    try:
+        kwargs = get_redis().connection_pool.connection_kwargs
+    finally:
+        get_redis.cache_clear()
+
+    assert kwargs["socket_timeout"] == 0.5
+    assert kwargs["socket_connect_timeout"] == 0.5
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from datetime import datetime
+from urllib.parse import quote
+
+import botocore.auth
+import botocore.signers
+import pytest
+
+from app.core.config import Settings
+from app.services.storage import (
+    build_s3_client,
+    build_s3_signer,
+    get_s3_client,
+    s3_bucket_url,
+)
+
+
+def test_s3_client_is_shared_and_pooled() -> None:
+    client = get_s3_client()
+
+    assert get_s3_client() is client
+    assert client.meta.config.max_pool_connections == 50
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {},
+        {"s3_region": "sa-east-1", "s3_use_ssl": False},
+        {"s3_endpoint_url": "http://minio:9000"},
+    ],
+)
+def test_local_signer_matches_botocore(monkeypatch, overrides) -> None:
+    settings = Settings(s3_access_key="AKIDEXAMPLE", s3_secret_key="secret", **overrides)
+    now = datetime(2024, 5, 17, 12, 30, 45)
+    monkeypatch.setattr(botocore.auth, "get_current_datetime", lambda: now)
+    monkeypatch.setattr(botocore.signers, "get_current_datetime", lambda: now)
+    client = build_s3_client(settings)
+    signer = build_s3_signer(settings)
+    key = "users/42/body/front photo+1~é.jpg"
+
+    expected_post = client.generate_presigned_post(
+        Bucket=settings.s3_bucket,
+        Key=key,
+        Fields={"acl": "private"},
+        Conditions=[["eq", "$acl", "private"]],
+        ExpiresIn=600,
+    )
+    local_post = signer.presign_post(
+        url=s3_bucket_url(settings),
+        bucket=settings.s3_bucket,
+        key=key,
+        fields={"acl": "private"},
+        conditions=[["eq", "$acl", "private"]],
+        expires_in=600,
+        now=now,
+    )
+    assert local_post == expected_post
+
+    expected_get = client.generate_presigned_url(
+        "get_object", Params={"Bucket": settings.s3_bucket, "Key": key}, ExpiresIn=600
+    )
+    object_url = f"{s3_bucket_url(settings).rstrip('/')}/{quote(key, safe='/~')}"
+    assert signer.presign_get(url=object_url, expires_in=600, now=now) == expected_get